@@ -4,7 +4,18 @@ Registers models with the Django admin interface and customizes their display an
 """
 
 from django.contrib import admin
-from .models import Election, Choice, Voter, VotingSession, AuthChallenge
+from .models import (
+    Election,
+    Choice,
+    Voter,
+    VotingSession,
+    AuthChallenge,
+    VoteTransaction,
+    ElectionResult,
+    VoteEvent,
+    SyncCheckpoint,
+    RelayerLane,
+)
 
 
 @admin.register(Election)
@@ -25,7 +36,7 @@ class ChoiceAdmin(admin.ModelAdmin):
 @admin.register(Voter)
 class VoterAdmin(admin.ModelAdmin):
     list_display = ("pesel", "email", "election", "is_authenticated", "has_voted")
-    search_fields = ("pesel", "email")
+    search_fields = ("pesel", "email", "voter_key")
     list_filter = ("election", "is_authenticated", "has_voted")
 
 
@@ -50,3 +61,44 @@ class AuthChallengeAdmin(admin.ModelAdmin):
     list_display = ("address", "expires_at")
     search_fields = ("address",)
     list_filter = ("expires_at",)
+
+
+@admin.register(VoteTransaction)
+class VoteTransactionAdmin(admin.ModelAdmin):
+    list_display = ("id", "election", "status", "sender", "nonce", "tx_hash", "created_at")
+    search_fields = ("voter_key", "tx_hash")
+    list_filter = ("status", "election")
+    readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(ElectionResult)
+class ElectionResultAdmin(admin.ModelAdmin):
+    list_display = ("election", "total_votes", "block_number", "finalized_at")
+    readonly_fields = ("finalized_at",)
+
+
+@admin.register(VoteEvent)
+class VoteEventAdmin(admin.ModelAdmin):
+    list_display = ("election_id", "choice_id", "voter_key", "block_number")
+    search_fields = ("voter_key", "tx_hash")
+    list_filter = ("election_id",)
+
+
+@admin.register(SyncCheckpoint)
+class SyncCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("name", "block_number", "updated_at")
+
+
+@admin.register(RelayerLane)
+class RelayerLaneAdmin(admin.ModelAdmin):
+    list_display = (
+        "address",
+        "enabled",
+        "disabled_reason",
+        "balance_wei",
+        "failures",
+        "paused_until",
+        "checked_at",
+    )
+    list_filter = ("enabled", "disabled_reason")
+    search_fields = ("address",)
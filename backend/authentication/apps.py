@@ -6,3 +6,9 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "authentication"
+
+    def ready(self):
+        from . import metrics  # noqa: F401  (installs the per-request query counter)
+        from .challenges import check_settings
+
+        check_settings()
@@ -0,0 +1,142 @@
+"""Async (AsyncWeb3) counterparts of the blockchain helpers in client.py
+
+They share the view-call cache with the synchronous client, so both can be used
+side by side. Only reads live here: votes are sent by the relayer worker from the
+outbox, which owns the lane nonces. Backends other than Web3ChainBackend run
+in-process, so their calls are delegated to the sync client.
+"""
+
+import asyncio
+import hashlib
+import threading
+from asgiref.sync import sync_to_async
+from web3 import AsyncWeb3
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+from django.conf import settings
+
+from . import client
+from .metrics import rpc
+from .backends import Web3ChainBackend
+from .client import (
+    BLOCK_NUMBER_KEY,
+    CALL_CACHE_TIMEOUT,
+    get_backend,
+    _call_cache,
+)
+
+_async_state = {}
+_async_lock = threading.Lock()
+
+
+def _async_contract():
+    """Returns (AsyncWeb3, contract) for the active Web3 backend, or None for other backends."""
+    backend = get_backend()
+    if not isinstance(backend, Web3ChainBackend):
+        return None
+    with _async_lock:
+        if _async_state.get("backend") is not backend:
+            # aiohttp keeps its own connection pool; async calls use the primary endpoint
+            async_w3 = AsyncWeb3(
+                AsyncWeb3.AsyncHTTPProvider(
+                    backend.rpc_url,
+                    request_kwargs={"timeout": settings.RPC_TIMEOUT_SECONDS},
+                )
+            )
+            _async_state.update(
+                backend=backend,
+                w3=async_w3,
+                contract=async_w3.eth.contract(
+                    address=backend.contract_address, abi=backend.abi
+                ),
+            )
+        return _async_state["w3"], _async_state["contract"]
+
+
+async def current_block() -> int:
+    cache = _call_cache()
+    block = await cache.aget(BLOCK_NUMBER_KEY)
+    if block is None:
+        chain = _async_contract()
+        if chain is None:
+            block = await sync_to_async(client.block_number)()
+        else:
+            with rpc("block_number"):
+                block = await chain[0].eth.block_number
+        await cache.aset(BLOCK_NUMBER_KEY, block, settings.CHAIN_BLOCK_CACHE_SECONDS)
+    return block
+
+
+async def cached_call(name: str, args: tuple, fetch, block: int | None = None):
+    """Async twin of client.cached_call; `fetch` is a coroutine function of the block."""
+    if block is None:
+        block = await current_block()
+    digest = hashlib.sha1(repr(args).encode()).hexdigest()
+    key = f"chain:{name}:{block}:{digest}"
+    cache = _call_cache()
+    value = await cache.aget(key)
+    if value is None:
+        value = await fetch(block)
+        await cache.aset(key, value, CALL_CACHE_TIMEOUT)
+    return value
+
+
+async def has_voted_onchain(voter_key_hex: str) -> bool:
+    """Checks if a voter has already voted on the blockchain."""
+    chain = _async_contract()
+    if chain is None:
+        return await sync_to_async(client.has_voted_onchain)(voter_key_hex)
+
+    voted_key = f"chain:hasVoted:{voter_key_hex.lower()}"
+    cache = _call_cache()
+    if await cache.aget(voted_key):
+        return True
+
+    async def fetch(block):
+        with rpc("has_voted"):
+            return await chain[1].functions.hasVoted(voter_key_hex).call(
+                block_identifier=block
+            )
+
+    voted = await cached_call("hasVoted", (voter_key_hex.lower(),), fetch)
+    if voted:
+        await cache.aset(voted_key, True, None)
+    return voted
+
+
+async def get_choice_counts(
+    election_id: int, choice_ids: list[int], block_identifier="latest"
+) -> dict[int, int]:
+    """Returns {choice_id: votes}, falling back to concurrent getChoiceCount calls."""
+    chain = _async_contract()
+    if chain is None:
+        return await sync_to_async(client.get_choice_counts)(
+            election_id, choice_ids, block_identifier
+        )
+
+    choice_ids = list(choice_ids)
+    if not choice_ids:
+        return {}
+    contract = chain[1]
+
+    async def fetch(block):
+        with rpc("choice_counts"):
+            try:
+                return await contract.functions.getChoiceCounts(
+                    election_id, choice_ids
+                ).call(block_identifier=block)
+            except (ContractLogicError, BadFunctionCallOutput):
+                return await asyncio.gather(
+                    *(
+                        contract.functions.getChoiceCount(election_id, cid).call(
+                            block_identifier=block
+                        )
+                        for cid in choice_ids
+                    )
+                )
+
+    block = None if block_identifier == "latest" else block_identifier
+    counts = await cached_call(
+        "getChoiceCounts", (election_id, tuple(choice_ids)), fetch, block
+    )
+    return dict(zip(choice_ids, counts))
+
@@ -0,0 +1,157 @@
+"""Async variants of the vote and results views for ASGI servers (e.g. uvicorn)
+
+Enabled with ASYNC_VIEWS=True; they keep the request/response contract of
+CastVoteView and ElectionResultsView while awaiting the ORM and AsyncWeb3.
+"""
+
+import json, math
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views import View
+from rest_framework.throttling import BaseThrottle
+
+from .models import Election
+from .async_client import get_choice_counts
+from .results import can_finalize, finalize_results
+from .signatures import recover_signer
+from .sessions import session_store
+from .throttling import throttle_wait, backlog_retry_after
+from .views import record_vote, parse_choice_id
+from .metrics import stage
+
+
+class AsyncAPIView(View):
+    """Plain async Django view exempt from CSRF like DRF's APIView"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+
+def client_ip(request) -> str:
+    """Client address as DRF's throttles identify it (honours NUM_PROXIES)."""
+    return BaseThrottle().get_ident(request)
+
+
+class AsyncCastVoteView(AsyncAPIView):
+    """Cast a vote for a given choice in an election, verifying voter's session and signature"""
+
+    async def post(self, request, election_id: int):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"detail": "Invalid JSON"}, status=400)
+
+        session_token = data.get("session_token")
+        choice_id = data.get("choice_id")
+        signature = data.get("signature")
+
+        if not session_token or choice_id is None or not signature:
+            return JsonResponse({"detail": "Missing fields"}, status=400)
+        if parse_choice_id(choice_id) is None:
+            return JsonResponse({"detail": "Invalid choice"}, status=400)
+
+        wait = await sync_to_async(throttle_wait)(
+            "vote",
+            {"ip": client_ip(request), "address": str(session_token).lower()},
+        )
+        if wait:
+            response = JsonResponse({"detail": "Request was throttled."}, status=429)
+            response["Retry-After"] = str(math.ceil(wait))
+            return response
+        with stage("vote", "backlog"):
+            retry_after = await sync_to_async(backlog_retry_after)()
+        if retry_after:
+            response = JsonResponse(
+                {"detail": "Too many votes in progress, try again later"}, status=503
+            )
+            response["Retry-After"] = str(retry_after)
+            return response
+
+        with stage("vote", "session"):
+            sess = await session_store.aget(session_token, election_id)
+        if sess is None:
+            return JsonResponse({"detail": "Invalid session"}, status=403)
+
+        if sess.is_expired():
+            return JsonResponse({"detail": "Session expired"}, status=401)
+
+        message = f"vote:{election_id}:{choice_id}:{sess.next_nonce}"
+        with stage("vote", "signature"):
+            try:
+                signer = await sync_to_async(recover_signer, thread_sensitive=False)(
+                    message, signature
+                )
+            except ValueError:
+                return JsonResponse({"detail": "Bad signature"}, status=403)
+        if signer.lower() != (sess.public_address or "").lower():
+            return JsonResponse({"detail": "Bad signature"}, status=403)
+
+        with stage("vote", "record"):
+            queued, error = await sync_to_async(record_vote)(
+                sess, parse_choice_id(choice_id)
+            )
+        if error:
+            detail, status = error
+            return JsonResponse({"detail": detail}, status=status)
+
+        return JsonResponse(
+            {
+                "vote_id": queued.id,
+                "status": queued.status,
+                "txHash": queued.tx_hash,
+                "public_address": sess.public_address,
+                "next_nonce": sess.next_nonce,
+            },
+            status=200,
+        )
+
+
+class AsyncElectionResultsView(AsyncAPIView):
+    """Returns per-choice counts for a finished election (snapshot or live contract read)"""
+
+    async def get(self, request, election_id: int):
+        with stage("results", "election"):
+            try:
+                election = await Election.objects.select_related("result").aget(
+                    pk=election_id
+                )
+            except Election.DoesNotExist:
+                return JsonResponse({"detail": "Election not found"}, status=404)
+
+            now = timezone.now()
+            if election.end_date > now:
+                return JsonResponse({"detail": "Election not finished"}, status=400)
+
+            choices = [c async for c in election.choices.all()]
+        snapshot = getattr(election, "result", None)
+        try:
+            if snapshot is None:
+                with stage("results", "finalize"):
+                    if await sync_to_async(can_finalize)(election):
+                        snapshot = await sync_to_async(finalize_results)(
+                            election, [c.id for c in choices]
+                        )
+            if snapshot is not None:
+                counts = {c.id: snapshot.count_for(c.id) for c in choices}
+            else:
+                with stage("results", "chain"):
+                    counts = await get_choice_counts(
+                        election_id, [c.id for c in choices]
+                    )
+        except Exception as e:
+            return JsonResponse({"detail": f"Contract call failed: {e}"}, status=500)
+
+        results = [
+            {"choice_id": choice.id, "name": choice.name, "votes": counts[choice.id]}
+            for choice in choices
+        ]
+
+        payload = {"results": results, "final": snapshot is not None}
+        if snapshot is not None:
+            payload["block_number"] = snapshot.block_number
+            payload["finalized_at"] = snapshot.finalized_at
+        return JsonResponse(payload, status=200)
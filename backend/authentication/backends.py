@@ -0,0 +1,450 @@
+"""Chain backends implementing the ElectionManager operations used by the app
+
+Web3ChainBackend talks to the deployed contract over JSON-RPC. InMemoryChainBackend
+simulates ElectionManager.sol in-process, mining one block per transaction, so the
+Django side can run and be load-tested without a network. The active backend is
+chosen with the CHAIN_BACKEND setting (see client.get_backend).
+"""
+
+import os, json, threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from eth_account import Account
+from eth_utils import keccak, to_hex
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.exceptions import (
+    BadFunctionCallOutput,
+    ContractLogicError,
+    TransactionNotFound,
+    Web3Exception,
+)
+from web3.logs import DISCARD
+
+from .providers import FailoverHTTPProvider
+
+ABI_PATH = os.path.join(settings.BASE_DIR, "abi", "ElectionManager.json")
+VOTE_CAST_TOPIC = to_hex(keccak(text="VoteCast(uint256,uint256,bytes32)"))
+SEPOLIA_CHAIN_ID = 11155111
+
+
+def load_abi() -> list:
+    with open(ABI_PATH, "r") as f:
+        return json.load(f)["abi"]
+
+
+def raw_transaction(signed) -> bytes:
+    """Returns raw bytes of a signed transaction across eth-account versions."""
+    if hasattr(signed, "rawTransaction"):
+        return signed.rawTransaction
+    if hasattr(signed, "raw_transaction"):
+        return signed.raw_transaction
+    raise AttributeError(
+        "Signed transaction has no rawTransaction/raw_transaction attribute; check web3/eth-account versions"
+    )
+
+
+class ChainBackend:
+    """Operations the application needs from the ElectionManager contract
+
+    `block` arguments accept a block number or "latest". Receipts are mappings with
+    status, blockNumber, transactionIndex, gasUsed and logs; get_receipt returns
+    None while the transaction is pending. `fees` are EIP-1559 transaction fields
+    (maxFeePerGas, maxPriorityFeePerGas) in wei. Votes can be sent from any of the
+    relayer_addresses (nonce lanes); `sender=None` means the first one.
+    """
+
+    relayer_address: str
+    relayer_addresses: list[str]
+
+    def block_number(self) -> int:
+        raise NotImplementedError
+
+    def has_voted(self, voter_key_hex: str, block="latest") -> bool:
+        raise NotImplementedError
+
+    def has_voted_many(self, voter_keys: list[str], block="latest") -> list[bool]:
+        """hasVoted for several keys, in order."""
+        return [self.has_voted(key, block) for key in voter_keys]
+
+    def choice_counts(self, election_id: int, choice_ids: list[int], block="latest") -> list[int]:
+        raise NotImplementedError
+
+    def pending_nonce(self, sender: str | None = None) -> int:
+        raise NotImplementedError
+
+    def balance(self, address: str) -> int:
+        """Account balance in wei."""
+        raise NotImplementedError
+
+    def is_relayer(self, address: str) -> bool:
+        """Whether the contract accepts votes from the address (owner or relayers set)."""
+        raise NotImplementedError
+
+    def set_relayer(self, address: str, allowed: bool) -> str:
+        """Owner-only setRelayer; returns the transaction hash."""
+        raise NotImplementedError
+
+    def fee_history(self, block_count: int, percentile: float) -> tuple[int, list[int]]:
+        """Next block's base fee and the `percentile` priority fee of recent blocks."""
+        raise NotImplementedError
+
+    def estimate_gas(self, votes: list[tuple[int, str, int]], batch: bool) -> int:
+        """Gas used by markVotedAndCount (one vote) or markVotedAndCountBatch."""
+        raise NotImplementedError
+
+    def send_vote(self, election_id: int, voter_key_hex: str, choice_id: int, nonce: int, gas: int, fees: dict, sender: str | None = None) -> str:
+        """markVotedAndCount; returns the transaction hash."""
+        raise NotImplementedError
+
+    def send_votes(self, votes: list[tuple[int, str, int]], nonce: int, gas: int, fees: dict, sender: str | None = None) -> str:
+        """markVotedAndCountBatch; returns the transaction hash."""
+        raise NotImplementedError
+
+    def get_receipt(self, tx_hash: str):
+        raise NotImplementedError
+
+    def counted_voter_keys(self, receipt) -> set[str]:
+        """Lower-case voter keys of the VoteCast events in a receipt."""
+        raise NotImplementedError
+
+    def get_vote_logs(self, from_block: int, to_block: int) -> list[dict]:
+        """Decoded VoteCast logs of an inclusive block range."""
+        raise NotImplementedError
+
+
+class Web3ChainBackend(ChainBackend):
+    """ElectionManager deployed on an EVM chain, reached over JSON-RPC"""
+
+    def __init__(self):
+        if not settings.RPC_URLS:
+            raise ImproperlyConfigured("Set RPC_URLS or ALCHEMY_API_KEY")
+        self.rpc_url = settings.RPC_URLS[0]
+        self.provider = FailoverHTTPProvider(
+            settings.RPC_URLS,
+            timeout=settings.RPC_TIMEOUT_SECONDS,
+            pool_size=settings.RPC_POOL_SIZE,
+            failure_threshold=settings.RPC_FAILURE_THRESHOLD,
+            cooldown=settings.RPC_COOLDOWN_SECONDS,
+        )
+        self.w3 = Web3(self.provider)
+        self.contract_address = Web3.to_checksum_address(os.environ["CONTRACT_ADDRESS"])
+        self.abi = load_abi()
+        self.contract = self.w3.eth.contract(address=self.contract_address, abi=self.abi)
+        # The deployer owns the contract; relayer lanes default to the owner account
+        self.account = Account.from_key(os.environ["DEPLOYER_PRIVATE_KEY"])
+        keys = settings.RELAYER_PRIVATE_KEYS or [os.environ["DEPLOYER_PRIVATE_KEY"]]
+        self.relayers = {}
+        for key in keys:
+            account = Account.from_key(key)
+            self.relayers[account.address] = account
+        self.relayer_addresses = list(self.relayers)
+        self.relayer_address = self.relayer_addresses[0]
+
+    def block_number(self) -> int:
+        return self.w3.eth.block_number
+
+    def has_voted(self, voter_key_hex: str, block="latest") -> bool:
+        return self.contract.functions.hasVoted(voter_key_hex).call(
+            block_identifier=block
+        )
+
+    def has_voted_many(self, voter_keys: list[str], block="latest") -> list[bool]:
+        calls = [self.contract.functions.hasVoted(key) for key in voter_keys]
+        return self._batch_calls(calls, block)
+
+    def choice_counts(self, election_id: int, choice_ids: list[int], block="latest") -> list[int]:
+        try:
+            return self.contract.functions.getChoiceCounts(election_id, choice_ids).call(
+                block_identifier=block
+            )
+        except (ContractLogicError, BadFunctionCallOutput):
+            return self._batched_choice_counts(election_id, choice_ids, block)
+
+    def _batched_choice_counts(self, election_id: int, choice_ids: list[int], block) -> list[int]:
+        calls = [
+            self.contract.functions.getChoiceCount(election_id, choice_id)
+            for choice_id in choice_ids
+        ]
+        return self._batch_calls(calls, block)
+
+    def _batch_calls(self, calls: list, block) -> list:
+        try:
+            with self.w3.batch_requests() as batch:
+                for fn_call in calls:
+                    batch.add(fn_call.call(block_identifier=block))
+                return list(batch.execute())
+        except Web3Exception:
+            # Provider without JSON-RPC batch support: one call each
+            return [fn_call.call(block_identifier=block) for fn_call in calls]
+
+    def pending_nonce(self, sender: str | None = None) -> int:
+        return self.w3.eth.get_transaction_count(sender or self.relayer_address, "pending")
+
+    def balance(self, address: str) -> int:
+        return self.w3.eth.get_balance(address)
+
+    def is_relayer(self, address: str) -> bool:
+        if address == self.account.address:
+            return True
+        return self.contract.functions.relayers(address).call()
+
+    def set_relayer(self, address: str, allowed: bool) -> str:
+        fn_call = self.contract.functions.setRelayer(
+            Web3.to_checksum_address(address), allowed
+        )
+        nonce = self.w3.eth.get_transaction_count(self.account.address, "pending")
+        fees = {
+            "maxFeePerGas": self.w3.eth.gas_price * 2,
+            "maxPriorityFeePerGas": self.w3.eth.max_priority_fee,
+        }
+        gas = fn_call.estimate_gas({"from": self.account.address})
+        return self._send(fn_call, nonce, gas, fees, self.account)
+
+    def fee_history(self, block_count: int, percentile: float) -> tuple[int, list[int]]:
+        history = self.w3.eth.fee_history(block_count, "latest", [percentile])
+        return history["baseFeePerGas"][-1], [r[0] for r in history["reward"]]
+
+    def _vote_call(self, votes: list[tuple[int, str, int]], batch: bool):
+        if not batch:
+            return self.contract.functions.markVotedAndCount(*votes[0])
+        return self.contract.functions.markVotedAndCountBatch(
+            [v[0] for v in votes], [v[1] for v in votes], [v[2] for v in votes]
+        )
+
+    def estimate_gas(self, votes: list[tuple[int, str, int]], batch: bool) -> int:
+        return self._vote_call(votes, batch).estimate_gas({"from": self.relayer_address})
+
+    def _send(self, fn_call, nonce: int, gas: int, fees: dict, account) -> str:
+        tx = fn_call.build_transaction(
+            {
+                "from": account.address,
+                "nonce": nonce,
+                "gas": gas,
+                "maxFeePerGas": fees["maxFeePerGas"],
+                "maxPriorityFeePerGas": fees["maxPriorityFeePerGas"],
+                "chainId": SEPOLIA_CHAIN_ID,
+            }
+        )
+        signed = account.sign_transaction(tx)
+        tx_hash = self.w3.eth.send_raw_transaction(raw_transaction(signed))
+        return to_hex(tx_hash)
+
+    def send_vote(self, election_id: int, voter_key_hex: str, choice_id: int, nonce: int, gas: int, fees: dict, sender: str | None = None) -> str:
+        fn_call = self._vote_call([(election_id, voter_key_hex, choice_id)], batch=False)
+        return self._send(fn_call, nonce, gas, fees, self.relayers[sender or self.relayer_address])
+
+    def send_votes(self, votes: list[tuple[int, str, int]], nonce: int, gas: int, fees: dict, sender: str | None = None) -> str:
+        fn_call = self._vote_call(votes, batch=True)
+        return self._send(fn_call, nonce, gas, fees, self.relayers[sender or self.relayer_address])
+
+    def get_receipt(self, tx_hash: str):
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    def counted_voter_keys(self, receipt) -> set[str]:
+        events = self.contract.events.VoteCast().process_receipt(receipt, errors=DISCARD)
+        return {to_hex(ev["args"]["voterKey"]).lower() for ev in events}
+
+    def get_vote_logs(self, from_block: int, to_block: int) -> list[dict]:
+        event = self.contract.events.VoteCast()
+        logs = self.w3.eth.get_logs(
+            {
+                "address": self.contract_address,
+                "topics": [VOTE_CAST_TOPIC],
+                "fromBlock": from_block,
+                "toBlock": to_block,
+            }
+        )
+        votes = []
+        for log in logs:
+            args = event.process_log(log)["args"]
+            votes.append(
+                {
+                    "election_id": args["electionId"],
+                    "choice_id": args["choiceId"],
+                    "voter_key": to_hex(args["voterKey"]),
+                    "block_number": log["blockNumber"],
+                    "tx_hash": to_hex(log["transactionHash"]),
+                    "log_index": log["logIndex"],
+                }
+            )
+        return votes
+
+
+class InMemoryChainBackend(ChainBackend):
+    """In-process simulation of ElectionManager.sol
+
+    Mirrors the contract's semantics: markVotedAndCount reverts (receipt status 0)
+    for keys that already voted, markVotedAndCountBatch skips them, and every
+    counted vote emits a VoteCast log. Each transaction is mined in its own block,
+    must carry the sender's next nonce and pays gas from the sender's balance, like
+    on a real node. Relayer lanes are the addresses of RELAYER_PRIVATE_KEYS (all
+    authorized), or a single placeholder address.
+    """
+
+    OWNER = "0x000000000000000000000000000000000000dEaD"
+    GAS_BASE = 30_000
+    GAS_PER_VOTE = 50_000
+    BASE_FEE = 1_000_000_000
+    PRIORITY_FEE = 100_000_000
+    INITIAL_BALANCE = 10 * 10**18
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._block = 0
+        self.relayer_addresses = [
+            Account.from_key(key).address for key in settings.RELAYER_PRIVATE_KEYS
+        ] or [self.OWNER]
+        self.relayer_address = self.relayer_addresses[0]
+        self._relayers = set(self.relayer_addresses)
+        self._nonces = defaultdict(int)
+        self._balances = defaultdict(lambda: self.INITIAL_BALANCE)
+        self._voted = {}  # voter key -> block it voted in
+        self._counts = defaultdict(int)  # (election_id, choice_id) -> votes
+        self._events = []  # VoteCast logs in chain order
+        self._receipts = {}
+
+    def _at(self, block) -> int | None:
+        """Block number to read historical state at, or None for the head."""
+        if block == "latest" or block is None or block >= self._block:
+            return None
+        return block
+
+    def block_number(self) -> int:
+        with self._lock:
+            return self._block
+
+    def has_voted(self, voter_key_hex: str, block="latest") -> bool:
+        with self._lock:
+            voted_in = self._voted.get(voter_key_hex.lower())
+            at = self._at(block)
+            return voted_in is not None and (at is None or voted_in <= at)
+
+    def choice_counts(self, election_id: int, choice_ids: list[int], block="latest") -> list[int]:
+        with self._lock:
+            at = self._at(block)
+            if at is None:
+                return [self._counts[(election_id, c)] for c in choice_ids]
+            counts = defaultdict(int)
+            for ev in self._events:
+                if ev["block_number"] > at:
+                    break
+                if ev["election_id"] == election_id:
+                    counts[ev["choice_id"]] += 1
+            return [counts[c] for c in choice_ids]
+
+    def pending_nonce(self, sender: str | None = None) -> int:
+        with self._lock:
+            return self._nonces[sender or self.relayer_address]
+
+    def balance(self, address: str) -> int:
+        with self._lock:
+            return self._balances[address]
+
+    def is_relayer(self, address: str) -> bool:
+        with self._lock:
+            return address == self.OWNER or address in self._relayers
+
+    def set_relayer(self, address: str, allowed: bool) -> str:
+        with self._lock:
+            if allowed:
+                self._relayers.add(address)
+            else:
+                self._relayers.discard(address)
+            return self._mine(self.OWNER, self._nonces[self.OWNER], {}, lambda h: (1, []))
+
+    def fee_history(self, block_count: int, percentile: float) -> tuple[int, list[int]]:
+        return self.BASE_FEE, [self.PRIORITY_FEE] * block_count
+
+    def estimate_gas(self, votes: list[tuple[int, str, int]], batch: bool) -> int:
+        return self.GAS_BASE + self.GAS_PER_VOTE * len(votes)
+
+    def _mine(self, sender: str, nonce: int, fees: dict, apply) -> str:
+        with self._lock:
+            expected = self._nonces[sender]
+            if nonce != expected:
+                raise ValueError(
+                    f"nonce {'too low' if nonce < expected else 'too high'}: "
+                    f"expected {expected}, got {nonce}"
+                )
+            price = min(
+                fees.get("maxFeePerGas", 0),
+                self.BASE_FEE + fees.get("maxPriorityFeePerGas", 0),
+            )
+            if self._balances[sender] < self.GAS_BASE * price:
+                raise ValueError("insufficient funds for gas * price + value")
+            self._nonces[sender] += 1
+            self._block += 1
+            tx_hash = to_hex(keccak(text=f"{sender}:{nonce}"))
+            if sender != self.OWNER and sender not in self._relayers:
+                status, logs = 0, []  # require(..., "Not a relayer")
+            else:
+                status, logs = apply(tx_hash)
+            gas_used = self.GAS_BASE + self.GAS_PER_VOTE * len(logs)
+            self._balances[sender] -= gas_used * price
+            self._receipts[tx_hash] = AttributeDict(
+                {
+                    "transactionHash": tx_hash,
+                    "status": status,
+                    "blockNumber": self._block,
+                    "transactionIndex": 0,
+                    "gasUsed": gas_used,
+                    "logs": logs,
+                }
+            )
+            return tx_hash
+
+    def _count(self, election_id: int, voter_key_hex: str, choice_id: int, tx_hash: str, log_index: int) -> dict:
+        key = voter_key_hex.lower()
+        self._voted[key] = self._block
+        self._counts[(election_id, choice_id)] += 1
+        log = {
+            "election_id": election_id,
+            "choice_id": choice_id,
+            "voter_key": key,
+            "block_number": self._block,
+            "tx_hash": tx_hash,
+            "log_index": log_index,
+        }
+        self._events.append(log)
+        return log
+
+    def send_vote(self, election_id: int, voter_key_hex: str, choice_id: int, nonce: int, gas: int, fees: dict, sender: str | None = None) -> str:
+        def apply(tx_hash):
+            if voter_key_hex.lower() in self._voted:
+                return 0, []  # require(!hasVoted[voterKey], "Already voted")
+            return 1, [self._count(election_id, voter_key_hex, choice_id, tx_hash, 0)]
+
+        return self._mine(sender or self.relayer_address, nonce, fees, apply)
+
+    def send_votes(self, votes: list[tuple[int, str, int]], nonce: int, gas: int, fees: dict, sender: str | None = None) -> str:
+        def apply(tx_hash):
+            logs = []
+            for election_id, voter_key_hex, choice_id in votes:
+                if voter_key_hex.lower() in self._voted:
+                    continue  # VoteSkipped
+                logs.append(
+                    self._count(election_id, voter_key_hex, choice_id, tx_hash, len(logs))
+                )
+            return 1, logs
+
+        return self._mine(sender or self.relayer_address, nonce, fees, apply)
+
+    def get_receipt(self, tx_hash: str):
+        with self._lock:
+            return self._receipts.get(tx_hash)
+
+    def counted_voter_keys(self, receipt) -> set[str]:
+        return {log["voter_key"] for log in receipt["logs"]}
+
+    def get_vote_logs(self, from_block: int, to_block: int) -> list[dict]:
+        with self._lock:
+            return [
+                dict(ev)
+                for ev in self._events
+                if from_block <= ev["block_number"] <= to_block
+            ]
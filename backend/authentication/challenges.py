@@ -0,0 +1,120 @@
+"""Sign-in challenges, stored in the database or stateless (CHALLENGE_MODE)
+
+"db" (default): the challenge is an AuthChallenge row per address, replaced on every
+request and deleted when a verification uses it. Clients may omit it from verify.
+
+"hmac": a challenge is "evote:<address>:<expiry>:<random>:<mac>", where the mac is
+an HMAC (keyed by SECRET_KEY) over the other parts, checked without a database
+lookup. The client sends it back with the signature; single use is enforced by
+remembering consumed macs in CHALLENGE_CACHE_ALIAS until the challenge would have
+expired anyway, so that cache must be shared by every worker.
+"""
+
+import secrets, time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import AuthChallenge
+
+MODES = ("db", "hmac")
+PREFIX = "evote:"
+HMAC_SALT = "authentication.challenges"
+# Backends keeping entries in the worker's own memory, or not at all
+PER_PROCESS_CACHES = (LocMemCache, DummyCache)
+
+
+def check_settings():
+    """Rejects a challenge configuration that would let a used challenge be replayed."""
+    if settings.CHALLENGE_MODE not in MODES:
+        raise ImproperlyConfigured(f"CHALLENGE_MODE must be one of {', '.join(MODES)}")
+    alias = settings.CHALLENGE_CACHE_ALIAS
+    if settings.CHALLENGE_MODE == "hmac" and not settings.DEBUG:
+        if isinstance(caches[alias], PER_PROCESS_CACHES):
+            raise ImproperlyConfigured(
+                "CHALLENGE_MODE=hmac needs a cache shared by all workers; "
+                f"CHALLENGE_CACHE_ALIAS={alias!r} is per-process"
+            )
+
+
+def _hmac_mode() -> bool:
+    return settings.CHALLENGE_MODE == "hmac"
+
+
+def _mac(payload: str) -> str:
+    return salted_hmac(HMAC_SALT, payload, algorithm="sha256").hexdigest()
+
+
+def _cache():
+    return caches[settings.CHALLENGE_CACHE_ALIAS]
+
+
+def issue_challenge(address: str) -> str:
+    """Returns a challenge for the address, valid for CHALLENGE_TTL_SECONDS."""
+    if not _hmac_mode():
+        ch, _ = AuthChallenge.objects.update_or_create(
+            address=address.lower(),
+            defaults={
+                "nonce": PREFIX + secrets.token_hex(16),
+                "expires_at": timezone.now()
+                + timedelta(seconds=settings.CHALLENGE_TTL_SECONDS),
+            },
+        )
+        return ch.nonce
+    expiry = int(time.time()) + settings.CHALLENGE_TTL_SECONDS
+    payload = f"{address.lower()}:{expiry}:{secrets.token_hex(16)}"
+    return f"{PREFIX}{payload}:{_mac(payload)}"
+
+
+def _parse(nonce: str) -> tuple[str, str, int, str]:
+    """Splits a stateless challenge into (payload, address, expiry, mac)."""
+    if not nonce.startswith(PREFIX):
+        raise ValueError("Challenge not found")
+    try:
+        payload, mac = nonce.removeprefix(PREFIX).rsplit(":", 1)
+        owner, expiry, _ = payload.split(":")
+        return payload, owner, int(expiry), mac
+    except ValueError:
+        raise ValueError("Challenge not found")
+
+
+def check_challenge(address: str, nonce: str = "") -> str:
+    """Validates the challenge issued to `address` and returns the text to verify
+    the signature against. `nonce` is required in hmac mode only.
+
+    Raises ValueError with the client-facing reason when it is missing, forged,
+    issued for another address, expired or already used.
+    """
+    if not _hmac_mode():
+        ch = AuthChallenge.objects.filter(address=address.lower()).first()
+        if ch is None or (nonce and nonce != ch.nonce):
+            raise ValueError("Challenge not found")
+        if ch.expires_at < timezone.now():
+            raise ValueError("Challenge expired")
+        return ch.nonce
+
+    payload, owner, expiry, mac = _parse(nonce)
+    if not constant_time_compare(mac, _mac(payload)) or owner != address.lower():
+        raise ValueError("Challenge not found")
+    if expiry < time.time():
+        raise ValueError("Challenge expired")
+    if _cache().get(f"challenge:used:{mac}"):
+        raise ValueError("Challenge already used")
+    return nonce
+
+
+def consume_challenge(address: str, nonce: str) -> bool:
+    """Marks a checked challenge as used; False if another request consumed it first."""
+    if not _hmac_mode():
+        deleted, _ = AuthChallenge.objects.filter(
+            address=address.lower(), nonce=nonce
+        ).delete()
+        return deleted > 0
+    _, _, expiry, mac = _parse(nonce)
+    ttl = max(1, expiry - int(time.time()) + 1)
+    return _cache().add(f"challenge:used:{mac}", 1, ttl)
@@ -1,25 +1,45 @@
-"""Integration with blockchain for voter authentication and vote counting"""
+"""Integration with blockchain for voter authentication and vote counting
 
-import os, json
-from web3 import Web3
-from eth_account import Account
+The chain itself is reached through the backend selected by CHAIN_BACKEND
+(see backends.py); this module adds caching and nonce management on top of it.
+Backend calls are timed per method into the RPC metrics (see metrics.py).
+"""
+
+import hashlib, threading
 from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
 from eth_utils import keccak, to_hex
 
-# Alchemy (Web3) setup
-RPC = f"https://eth-sepolia.g.alchemy.com/v2/{os.environ['ALCHEMY_API_KEY']}"
-w3 = Web3(Web3.HTTPProvider(RPC))
+from .backends import ChainBackend
+from .metrics import instrument_backend
+
+CHAIN_BACKENDS = {
+    "web3": "authentication.backends.Web3ChainBackend",
+    "memory": "authentication.backends.InMemoryChainBackend",
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
 
-# Contract and relayer setup
-CONTRACT_ADDR = Web3.to_checksum_address(os.environ["CONTRACT_ADDRESS"])
-RELAYER_PK = os.environ["DEPLOYER_PRIVATE_KEY"]
-relayer = Account.from_key(RELAYER_PK)
+def get_backend() -> ChainBackend:
+    """Returns the process-wide chain backend, created on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = CHAIN_BACKENDS.get(settings.CHAIN_BACKEND, settings.CHAIN_BACKEND)
+            _backend = instrument_backend(import_string(path)())
+        return _backend
 
-# Load ABI and contract instance
-ABI_PATH = os.path.join(settings.BASE_DIR, "abi", "ElectionManager.json")
-with open(ABI_PATH, "r") as f:
-    ABI = json.load(f)["abi"]
-contract = w3.eth.contract(address=CONTRACT_ADDR, abi=ABI)
+
+def set_backend(backend: ChainBackend | None):
+    """Replaces the active backend (None recreates it from settings on next use)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend if backend is None else instrument_backend(backend)
+    nonce_manager.reset()
+    _lane_nonce_managers.clear()
 
 
 def voter_key(pesel: str, election_id: int, salt: str) -> str:
@@ -27,35 +47,267 @@ def voter_key(pesel: str, election_id: int, salt: str) -> str:
     return to_hex(keccak(text=f"{pesel}:{election_id}:{salt}"))
 
 
+def _voter_keys_chunk(pesels: list[str], election_id: int, salt: str) -> list[str]:
+    return [voter_key(pesel, election_id, salt) for pesel in pesels]
+
+
+def voter_keys(pesels: list[str], election_id: int, salt: str, executor=None) -> list[str]:
+    """Computes voter keys for many PESELs of one election, in order.
+
+    With a concurrent.futures executor the work is split into one chunk per worker.
+    """
+    workers = getattr(executor, "_max_workers", 1)
+    if executor is None or workers < 2 or len(pesels) < 2 * workers:
+        return _voter_keys_chunk(pesels, election_id, salt)
+    size = -(-len(pesels) // workers)
+    chunks = [pesels[i : i + size] for i in range(0, len(pesels), size)]
+    futures = [executor.submit(_voter_keys_chunk, c, election_id, salt) for c in chunks]
+    return [key for future in futures for key in future.result()]
+
+
+# Read-through cache for contract view calls. Entries are keyed by the block they
+# were read at, so seeing a new block implicitly invalidates everything before it
+BLOCK_NUMBER_KEY = "chain:block"
+CALL_CACHE_TIMEOUT = 120
+
+
+def _call_cache():
+    return caches[settings.CHAIN_CACHE_ALIAS]
+
+
+def block_number() -> int:
+    """Returns the chain head, always asking the backend."""
+    return get_backend().block_number()
+
+
+def current_block() -> int:
+    """Returns the latest block number, polled at most once per CHAIN_BLOCK_CACHE_SECONDS."""
+    cache = _call_cache()
+    block = cache.get(BLOCK_NUMBER_KEY)
+    if block is None:
+        block = block_number()
+        cache.set(BLOCK_NUMBER_KEY, block, settings.CHAIN_BLOCK_CACHE_SECONDS)
+    return block
+
+
+def cached_call(name: str, args: tuple, fetch, block: int | None = None):
+    """Returns fetch(block) cached under (function name, args, block number)."""
+    if block is None:
+        block = current_block()
+    digest = hashlib.sha1(repr(args).encode()).hexdigest()
+    key = f"chain:{name}:{block}:{digest}"
+    cache = _call_cache()
+    value = cache.get(key)
+    if value is None:
+        value = fetch(block)
+        cache.set(key, value, CALL_CACHE_TIMEOUT)
+    return value
+
+
 def has_voted_onchain(voter_key_hex: str) -> bool:
     """Checks if a voter has already voted on the blockchain."""
-    return contract.functions.hasVoted(voter_key_hex).call()
+    # A key that voted can never un-vote, so positive answers are kept for good
+    voted_key = f"chain:hasVoted:{voter_key_hex.lower()}"
+    cache = _call_cache()
+    if cache.get(voted_key):
+        return True
+    voted = cached_call(
+        "hasVoted",
+        (voter_key_hex.lower(),),
+        lambda block: get_backend().has_voted(voter_key_hex, block),
+    )
+    if voted:
+        cache.set(voted_key, True, None)
+    return voted
 
 
-def mark_voted_and_count(election_id: int, voter_key_hex: str, choice_id: int) -> str:
-    """Marks a voter as having voted and counts their vote on-chain."""
-    nonce = w3.eth.get_transaction_count(relayer.address)
-    tx = contract.functions.markVotedAndCount(
-        election_id, voter_key_hex, choice_id
-    ).build_transaction(
-        {
-            "from": relayer.address,
-            "nonce": nonce,
-            "gas": 250_000,
-            "maxFeePerGas": w3.to_wei("15", "gwei"),
-            "maxPriorityFeePerGas": w3.to_wei("1.5", "gwei"),
-            "chainId": 11155111,  # Sepolia chain ID
-        }
+def has_voted_many(voter_keys: list[str], block: int | str = "latest") -> list[bool]:
+    """Checks several voter keys in one JSON-RPC batch (uncached)."""
+    return get_backend().has_voted_many(voter_keys, block)
+
+
+def get_choice_counts(
+    election_id: int, choice_ids: list[int], block_identifier="latest"
+) -> dict[int, int]:
+    """Returns {choice_id: votes} for an election in a single RPC round-trip.
+
+    Uses the getChoiceCounts view and falls back to a JSON-RPC batch of
+    getChoiceCount calls for deployments that predate it. Results are cached
+    per block.
+    """
+    choice_ids = list(choice_ids)
+    if not choice_ids:
+        return {}
+    block = None if block_identifier == "latest" else block_identifier
+    counts = cached_call(
+        "getChoiceCounts",
+        (election_id, tuple(choice_ids)),
+        lambda block: get_backend().choice_counts(election_id, choice_ids, block),
+        block,
     )
-    signed = relayer.sign_transaction(tx)
-    if hasattr(signed, "rawTransaction"):
-        raw = signed.rawTransaction
-    elif hasattr(signed, "raw_transaction"):
-        raw = signed.raw_transaction
-    else:
-        raise AttributeError(
-            "Signed transaction has no rawTransaction/raw_transaction attribute; check web3/eth-account versions"
+    return dict(zip(choice_ids, counts))
+
+
+class NonceManager:
+    """Hands out nonces of one relayer account from a locally tracked counter
+
+    The counter is seeded once from the pending transaction count and then advanced
+    in-process, so consecutive sends skip the extra RPC round-trip. `address=None`
+    tracks the backend's primary relayer
+    """
+
+    def __init__(self, address: str | None = None):
+        self.address = address
+        self._next = None
+        self._lock = threading.Lock()
+
+    def reserve(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = get_backend().pending_nonce(self.address)
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    @property
+    def needs_sync(self) -> bool:
+        return self._next is None
+
+    def prime(self, pending_count: int):
+        """Seeds the counter from an externally fetched pending count (async callers)"""
+        with self._lock:
+            if self._next is None:
+                self._next = pending_count
+
+    def reset(self):
+        """Forgets the local counter so the next reservation resyncs with the chain"""
+        with self._lock:
+            self._next = None
+
+
+nonce_manager = NonceManager()
+_lane_nonce_managers = {}
+_lane_lock = threading.Lock()
+
+
+def nonce_manager_for(sender: str | None) -> NonceManager:
+    """Returns the nonce lane of a relayer account (None: the primary relayer)."""
+    if sender is None or sender == get_backend().relayer_address:
+        return nonce_manager
+    with _lane_lock:
+        if sender not in _lane_nonce_managers:
+            _lane_nonce_managers[sender] = NonceManager(sender)
+        return _lane_nonce_managers[sender]
+
+
+# EIP-1559 fee oracle over a cached eth_feeHistory window. maxFeePerGas leaves room
+# for the base fee to grow FEE_BASE_FEE_MULTIPLIER-fold before the tx is priced out
+FEES_KEY = "chain:fees"
+GWEI = 10**9
+
+
+def current_fees() -> dict:
+    """Returns {maxFeePerGas, maxPriorityFeePerGas} in wei, refreshed every FEE_CACHE_SECONDS."""
+    cache = _call_cache()
+    fees = cache.get(FEES_KEY)
+    if fees is None:
+        base_fee, rewards = get_backend().fee_history(
+            settings.FEE_HISTORY_BLOCKS, settings.FEE_REWARD_PERCENTILE
         )
+        rewards = sorted(rewards)
+        priority = rewards[len(rewards) // 2] if rewards else 0
+        cap = int(settings.FEE_MAX_GWEI * GWEI)
+        priority = min(max(priority, int(settings.FEE_MIN_PRIORITY_GWEI * GWEI)), cap)
+        max_fee = min(int(base_fee * settings.FEE_BASE_FEE_MULTIPLIER) + priority, cap)
+        fees = {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": priority}
+        cache.set(FEES_KEY, fees, settings.FEE_CACHE_SECONDS)
+    return fees
+
+
+def bumped_fees(previous: dict) -> dict | None:
+    """Fees for replacing a pending tx: RELAYER_FEE_BUMP_PERCENT above `previous`
+    (and at least the current market), or None once FEE_MAX_GWEI rules out a bump.
+    """
+    percent = 100 + settings.RELAYER_FEE_BUMP_PERCENT
+    cap = int(settings.FEE_MAX_GWEI * GWEI)
+    market = current_fees()
+    fees = {
+        name: max(int(previous[name] * percent // 100), market[name])
+        for name in market
+    }
+    if fees["maxFeePerGas"] > cap:
+        return None
+    return fees
+
+
+# Gas limits are estimated once per function and batch size, padded by
+# GAS_LIMIT_PADDING and kept for GAS_ESTIMATE_CACHE_SECONDS. A cached estimate may
+# come from votes hitting existing counter slots, while a later batch writes fresh
+# ones (~20k gas more per vote), so the limit never drops below the worst-case
+# per-vote allowance, which is also used when estimation fails
+FALLBACK_GAS_BASE = 60_000
+FALLBACK_GAS_PER_VOTE = 60_000
+
+
+def gas_limit(votes: list[tuple[int, str, int]], batch: bool) -> int:
+    """Returns the gas limit for sending `votes` singly (batch=False) or as a batch."""
+    worst_case = FALLBACK_GAS_BASE + FALLBACK_GAS_PER_VOTE * len(votes)
+    key = f"chain:gas:{'batch' if batch else 'single'}:{len(votes)}"
+    cache = _call_cache()
+    limit = cache.get(key)
+    if limit is None:
+        try:
+            estimate = get_backend().estimate_gas(votes, batch)
+        except Exception:
+            return worst_case
+        limit = max(int(estimate * settings.GAS_LIMIT_PADDING), worst_case)
+        cache.set(key, limit, settings.GAS_ESTIMATE_CACHE_SECONDS)
+    return limit
+
+
+def mark_voted_and_count(
+    election_id: int,
+    voter_key_hex: str,
+    choice_id: int,
+    nonce: int | None = None,
+    fees: dict | None = None,
+) -> str:
+    """Marks a voter as having voted and counts their vote on-chain."""
+    if nonce is None:
+        nonce = nonce_manager.reserve()
+    gas = gas_limit([(election_id, voter_key_hex, choice_id)], batch=False)
+    return get_backend().send_vote(
+        election_id, voter_key_hex, choice_id, nonce, gas, fees or current_fees()
+    )
+
+
+def mark_voted_and_count_batch(
+    votes: list[tuple[int, str, int]],
+    nonce: int | None = None,
+    fees: dict | None = None,
+    sender: str | None = None,
+) -> str:
+    """Counts several (election_id, voter_key, choice_id) votes in one transaction.
+
+    Keys that already voted are skipped on-chain instead of reverting the batch.
+    `sender` picks the relayer lane (default: the primary relayer).
+    """
+    if nonce is None:
+        nonce = nonce_manager_for(sender).reserve()
+    gas = gas_limit(votes, batch=True)
+    return get_backend().send_votes(votes, nonce, gas, fees or current_fees(), sender)
+
+
+def get_receipt(tx_hash: str):
+    """Returns the transaction receipt, or None while it is pending."""
+    return get_backend().get_receipt(tx_hash)
+
+
+def counted_voter_keys(receipt) -> set[str]:
+    """Returns lower-case voter keys of VoteCast events emitted in a receipt."""
+    return get_backend().counted_voter_keys(receipt)
+
 
-    tx_hash = w3.eth.send_raw_transaction(raw)
-    return tx_hash.hex()
+def get_vote_logs(from_block: int, to_block: int) -> list[dict]:
+    """Fetches and decodes VoteCast logs emitted in an inclusive block range."""
+    return get_backend().get_vote_logs(from_block, to_block)
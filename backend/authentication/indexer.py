@@ -0,0 +1,59 @@
+"""Incremental indexer copying VoteCast logs from the chain into VoteEvent rows"""
+
+from django.conf import settings
+from django.db import transaction
+from requests.exceptions import Timeout
+from web3.exceptions import Web3Exception
+
+from .models import VoteEvent, SyncCheckpoint
+from .client import block_number, get_vote_logs
+
+CHECKPOINT_NAME = "vote_cast"
+INITIAL_BLOCK_RANGE = 500
+
+
+def sync_vote_events(reorg_depth: int | None = None, max_range: int | None = None) -> int:
+    """Indexes VoteCast logs up to the chain head; returns the number of rows stored.
+
+    Every run re-scans the last `reorg_depth` indexed blocks and replaces their rows,
+    so logs dropped by a shallow reorg disappear and their replacements are picked up.
+    The eth_getLogs range halves when the provider rejects or times out on a query
+    and doubles again (up to `max_range`) after each successful one.
+    """
+    if reorg_depth is None:
+        reorg_depth = settings.INDEXER_REORG_DEPTH
+    max_range = max_range or settings.INDEXER_MAX_BLOCK_RANGE
+
+    checkpoint, _ = SyncCheckpoint.objects.get_or_create(
+        name=CHECKPOINT_NAME,
+        defaults={"block_number": settings.INDEXER_START_BLOCK - 1},
+    )
+    from_block = max(
+        settings.INDEXER_START_BLOCK, checkpoint.block_number - reorg_depth + 1
+    )
+    head = block_number()
+    span = min(INITIAL_BLOCK_RANGE, max_range)
+    stored = 0
+
+    while from_block <= head:
+        to_block = min(from_block + span - 1, head)
+        try:
+            votes = get_vote_logs(from_block, to_block)
+        except (Web3Exception, Timeout):
+            if span == 1:
+                raise
+            span = max(1, span // 2)
+            continue
+
+        with transaction.atomic():
+            VoteEvent.objects.filter(
+                block_number__gte=from_block, block_number__lte=to_block
+            ).delete()
+            VoteEvent.objects.bulk_create([VoteEvent(**v) for v in votes])
+            checkpoint.block_number = max(checkpoint.block_number, to_block)
+            checkpoint.save(update_fields=["block_number", "updated_at"])
+
+        stored += len(votes)
+        from_block = to_block + 1
+        span = min(max_range, span * 2)
+    return stored
@@ -0,0 +1,111 @@
+"""Relayer lanes: the pool of accounts submitting votes, each with its own nonces
+
+Every account in RELAYER_PRIVATE_KEYS is a lane. New batches go to the enabled lane
+with the fewest unconfirmed votes. A lane whose send fails is paused for
+RELAYER_LANE_COOLDOWN_SECONDS; check_lanes disables lanes whose balance drops
+below RELAYER_MIN_BALANCE_ETH or that the contract does not accept, and enables
+them again once funded or authorized. Disabled lanes are drained: they get no new
+votes while what they already sent is confirmed as usual.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .client import get_backend
+from .models import RelayerLane, VoteTransaction
+
+AUTOMATIC_REASONS = (
+    RelayerLane.REASON_UNDERFUNDED,
+    RelayerLane.REASON_UNAUTHORIZED,
+    RelayerLane.REASON_NOT_CONFIGURED,
+)
+
+
+def sync_lanes():
+    """Creates rows for configured lanes and disables lanes no longer configured."""
+    configured = get_backend().relayer_addresses
+    RelayerLane.objects.bulk_create(
+        [RelayerLane(address=a) for a in configured], ignore_conflicts=True
+    )
+    RelayerLane.objects.exclude(address__in=configured).filter(enabled=True).update(
+        enabled=False, disabled_reason=RelayerLane.REASON_NOT_CONFIGURED
+    )
+    RelayerLane.objects.filter(
+        address__in=configured, disabled_reason=RelayerLane.REASON_NOT_CONFIGURED
+    ).update(enabled=True, disabled_reason="")
+
+
+def check_lanes() -> list[str]:
+    """Refreshes lane balances and authorization; returns a line per state change."""
+    sync_lanes()
+    backend = get_backend()
+    min_balance = int(Decimal(str(settings.RELAYER_MIN_BALANCE_ETH)) * 10**18)
+    changes = []
+    for lane in RelayerLane.objects.filter(address__in=backend.relayer_addresses):
+        lane.balance_wei = backend.balance(lane.address)
+        lane.checked_at = timezone.now()
+        reason = ""
+        if lane.balance_wei < min_balance:
+            reason = RelayerLane.REASON_UNDERFUNDED
+        elif not backend.is_relayer(lane.address):
+            reason = RelayerLane.REASON_UNAUTHORIZED
+
+        if reason and (lane.enabled or lane.disabled_reason != reason):
+            if lane.enabled or lane.disabled_reason in AUTOMATIC_REASONS:
+                lane.enabled = False
+                lane.disabled_reason = reason
+                changes.append(f"Lane {lane.address} disabled: {reason}")
+        elif not reason and lane.disabled_reason in AUTOMATIC_REASONS:
+            lane.enabled = True
+            lane.disabled_reason = ""
+            changes.append(f"Lane {lane.address} enabled")
+        lane.save()
+    return changes
+
+
+def lane_loads(addresses: list[str]) -> dict[str, int]:
+    """Unconfirmed (sent) votes per lane address."""
+    return dict(
+        VoteTransaction.objects.filter(
+            status=VoteTransaction.STATUS_SENT, sender__in=addresses
+        )
+        .values_list("sender")
+        .annotate(n=Count("id"))
+    )
+
+
+def pick_lane() -> RelayerLane | None:
+    """Returns the least loaded healthy lane, or None when every lane is unavailable."""
+    configured = get_backend().relayer_addresses
+    lanes = list(
+        RelayerLane.objects.filter(enabled=True, address__in=configured).exclude(
+            paused_until__gt=timezone.now()
+        )
+    )
+    if not lanes:
+        if RelayerLane.objects.filter(address__in=configured).exists():
+            return None
+        sync_lanes()
+        return pick_lane()
+    if len(lanes) == 1:
+        return lanes[0]
+    loads = lane_loads([lane.address for lane in lanes])
+    return min(lanes, key=lambda lane: (loads.get(lane.address, 0), lane.id))
+
+
+def lane_failed(lane: RelayerLane):
+    lane.failures += 1
+    lane.paused_until = timezone.now() + timedelta(
+        seconds=settings.RELAYER_LANE_COOLDOWN_SECONDS
+    )
+    lane.save(update_fields=["failures", "paused_until"])
+
+
+def lane_recovered(lane: RelayerLane):
+    if lane.failures or lane.paused_until:
+        lane.failures = 0
+        lane.paused_until = None
+        lane.save(update_fields=["failures", "paused_until"])
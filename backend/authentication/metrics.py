@@ -0,0 +1,246 @@
+"""In-process request, stage, database and RPC metrics in the Prometheus text format
+
+Counters and histograms are plain dicts guarded by a lock, so recording a sample is
+a bisect and two additions. Each worker process keeps its own registry and serves it
+on /metrics; Prometheus sums the per-worker series when scraping every worker.
+Disabled entirely with METRICS_ENABLED=False.
+"""
+
+import bisect, threading, time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", r"\\").replace('"', r"\""))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: tuple = ()):
+        self.name, self.doc, self.labels = name, doc, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values, amount: float = 1):
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labels: tuple = (), buckets=LATENCY_BUCKETS):
+        self.name, self.doc, self.labels = name, doc, labels
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self._lock:
+            for values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    labels = _labels(names, values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _labels(self.labels, values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "evote_request_seconds",
+    "Request latency by view, method and status code",
+    ("view", "method", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "evote_request_db_queries",
+    "Database queries issued per request",
+    ("view",),
+    QUERY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "evote_stage_seconds",
+    "Time spent in each stage of the challenge, verify, vote and results views",
+    ("view", "stage"),
+)
+RPC_SECONDS = Histogram(
+    "evote_rpc_seconds", "Chain backend call latency by method", ("method",)
+)
+RPC_ERRORS = Counter(
+    "evote_rpc_errors_total", "Chain backend calls that raised, by method", ("method",)
+)
+REGISTRY = [REQUEST_SECONDS, REQUEST_QUERIES, STAGE_SECONDS, RPC_SECONDS, RPC_ERRORS]
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+@contextmanager
+def stage(view: str, name: str):
+    """Times the enclosed block as one stage of a view (also on early return)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, view, name)
+
+
+@contextmanager
+def rpc(method: str):
+    """Times one chain call; calls that raise are also counted as errors."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        RPC_ERRORS.inc(method)
+        raise
+    finally:
+        RPC_SECONDS.observe(time.perf_counter() - start, method)
+
+
+# ChainBackend methods the application calls; the rest are local helpers
+BACKEND_METHODS = (
+    "block_number",
+    "has_voted",
+    "has_voted_many",
+    "choice_counts",
+    "pending_nonce",
+    "balance",
+    "is_relayer",
+    "set_relayer",
+    "fee_history",
+    "estimate_gas",
+    "send_vote",
+    "send_votes",
+    "get_receipt",
+    "get_vote_logs",
+)
+
+
+def _timed(method: str, call):
+    def wrapper(*args, **kwargs):
+        with rpc(method):
+            return call(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument_backend(backend):
+    """Wraps the backend instance's chain calls with rpc() timers, once."""
+    if not settings.METRICS_ENABLED or getattr(backend, "_metrics", False):
+        return backend
+    for method in BACKEND_METHODS:
+        call = getattr(backend, method, None)
+        if call is not None:
+            setattr(backend, method, _timed(method, call))
+    backend._metrics = True
+    return backend
+
+
+# Query counter of the current request. Context variables follow the request into
+# sync_to_async threads, where async views run their ORM calls on other connections
+_request_queries = ContextVar("request_queries", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def _install_query_counter(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED and _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+class MetricsMiddleware:
+    """Records latency and database query count of every request (sync or async)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._record(request, response, time.perf_counter() - start, queries[0])
+        return response
+
+    async def _acall(self, request):
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._record(request, response, time.perf_counter() - start, queries[0])
+        return response
+
+    def _record(self, request, response, elapsed: float, queries: int):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unmatched"
+        REQUEST_SECONDS.observe(elapsed, view, request.method, response.status_code)
+        REQUEST_QUERIES.observe(queries, view)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; requires `Authorization: Bearer <METRICS_TOKEN>` if set."""
+    if not settings.METRICS_ENABLED:
+        return HttpResponse(status=404)
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not constant_time_compare(supplied, settings.METRICS_TOKEN):
+            return HttpResponse(status=401)
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
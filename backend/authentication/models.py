@@ -11,6 +11,16 @@ class Election(models.Model):
     description = models.TextField(blank=True, null=True)
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
+    # Versions the cached election responses (see response_cache.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # List ordering and keyset pagination; also serves the "upcoming" filter
+            models.Index(fields=["-start_date", "id"], name="election_start_id_idx"),
+            # "archive" (end_date < now) and "active" (end_date >= now, start_date <= now)
+            models.Index(fields=["end_date", "-start_date"], name="election_end_start_idx"),
+        ]
 
 
 class Choice(models.Model):
@@ -21,6 +31,7 @@ class Choice(models.Model):
     election = models.ForeignKey(
         Election, on_delete=models.CASCADE, related_name="choices"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class Voter(models.Model):
@@ -34,6 +45,8 @@ class Voter(models.Model):
     )
     is_authenticated = models.BooleanField(default=False)
     has_voted = models.BooleanField(default=False)
+    # keccak(pesel:election:SECRET_SALT) as stored on-chain; rebuilt by rebuild_voter_keys
+    voter_key = models.CharField(max_length=66, blank=True, default="", db_index=True)
 
     class Meta:
         unique_together = ("pesel", "election")
@@ -45,15 +58,29 @@ class VotingSession(models.Model):
     session_id = models.CharField(max_length=64, unique=True)
     pesel = models.CharField(max_length=11)
     email = models.CharField(max_length=200, blank=True, null=True)
-    election_id = models.IntegerField()
+    election = models.ForeignKey(
+        Election, on_delete=models.CASCADE, related_name="voting_sessions"
+    )
     public_address = models.CharField(max_length=64, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_verified = models.BooleanField(default=False)
     has_voted = models.BooleanField(default=False)
     next_nonce = models.BigIntegerField(default=1)
 
+    LIFETIME_SECONDS = 3600
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["election", "pesel"], name="session_election_pesel_idx"),
+            models.Index(fields=["created_at"], name="session_created_idx"),
+        ]
+
+    def seconds_left(self) -> int:
+        elapsed = (timezone.now() - self.created_at).total_seconds()
+        return max(0, int(self.LIFETIME_SECONDS - elapsed))
+
     def is_expired(self) -> bool:
-        return (timezone.now() - self.created_at).total_seconds() > 3600
+        return (timezone.now() - self.created_at).total_seconds() > self.LIFETIME_SECONDS
 
 
 class AuthChallenge(models.Model):
@@ -66,5 +93,119 @@ class AuthChallenge(models.Model):
     expires_at = models.DateTimeField(db_index=True)
 
     @classmethod
-    def purge_expired(cls):
-        cls.objects.filter(expires_at__lt=timezone.now()).delete()
+    def purge_expired(cls) -> int:
+        deleted, _ = cls.objects.filter(expires_at__lt=timezone.now()).delete()
+        return deleted
+
+
+class VoteTransaction(models.Model):
+    """Model representing a vote queued for on-chain submission by the relayer
+    rows are written by the vote endpoint and drained in order by the relayer worker
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_SENT = "sent"
+    STATUS_CONFIRMED = "confirmed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_CONFIRMED, "Confirmed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    election = models.ForeignKey(
+        Election, on_delete=models.CASCADE, related_name="vote_transactions"
+    )
+    # Unique among votes that have not failed for good (see Meta)
+    voter_key = models.CharField(max_length=66, db_index=True)
+    choice_id = models.BigIntegerField()
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True
+    )
+    # Relayer account (nonce lane) the vote was sent from
+    sender = models.CharField(max_length=42, blank=True, null=True, db_index=True)
+    nonce = models.BigIntegerField(blank=True, null=True)
+    tx_hash = models.CharField(max_length=66, blank=True, null=True, db_index=True)
+    # Earlier hashes of the same nonce, re-broadcast with higher fees; one of them may still be mined
+    replaced_tx_hashes = models.JSONField(default=list, blank=True)
+    max_fee_per_gas = models.BigIntegerField(blank=True, null=True)
+    max_priority_fee_per_gas = models.BigIntegerField(blank=True, null=True)
+    block_number = models.BigIntegerField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # Queued votes whose send failed are not picked up again before this time
+    retry_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # A failed vote releases its voter, who may then queue a new one
+            models.UniqueConstraint(
+                fields=["voter_key"],
+                condition=~models.Q(status="failed"),
+                name="vote_tx_voter_key_unfailed_uniq",
+            ),
+        ]
+
+
+class ElectionResult(models.Model):
+    """Model representing frozen on-chain results of a finished election
+    counts are read once at `block_number` after every queued vote is settled
+    """
+
+    election = models.OneToOneField(
+        Election, on_delete=models.CASCADE, related_name="result"
+    )
+    counts = models.JSONField(default=dict)
+    total_votes = models.PositiveIntegerField(default=0)
+    block_number = models.BigIntegerField()
+    finalized_at = models.DateTimeField(default=timezone.now)
+
+    def count_for(self, choice_id: int) -> int:
+        return self.counts.get(str(choice_id), 0)
+
+
+class VoteEvent(models.Model):
+    """Model representing a VoteCast log copied from the chain by the indexer"""
+
+    election_id = models.BigIntegerField()
+    choice_id = models.BigIntegerField()
+    voter_key = models.CharField(max_length=66, db_index=True)
+    block_number = models.BigIntegerField(db_index=True)
+    tx_hash = models.CharField(max_length=66)
+    log_index = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("tx_hash", "log_index")
+        indexes = [models.Index(fields=["election_id", "choice_id"])]
+
+
+class SyncCheckpoint(models.Model):
+    """Model representing the last block processed by a chain indexer"""
+
+    name = models.CharField(max_length=64, unique=True)
+    block_number = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class RelayerLane(models.Model):
+    """Model representing a relayer account submitting votes with its own nonces
+    disabled lanes receive no new votes; what they already sent still confirms
+    """
+
+    REASON_UNDERFUNDED = "underfunded"
+    REASON_UNAUTHORIZED = "not authorized"
+    REASON_NOT_CONFIGURED = "not configured"
+    REASON_MANUAL = "disabled manually"
+
+    address = models.CharField(max_length=42, unique=True)
+    enabled = models.BooleanField(default=True)
+    disabled_reason = models.CharField(max_length=32, blank=True, default="")
+    balance_wei = models.DecimalField(
+        max_digits=40, decimal_places=0, blank=True, null=True
+    )
+    failures = models.PositiveIntegerField(default=0)
+    paused_until = models.DateTimeField(blank=True, null=True)
+    checked_at = models.DateTimeField(blank=True, null=True)
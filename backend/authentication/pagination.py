@@ -0,0 +1,30 @@
+"""Pagination for the election list
+
+Page numbers (`?page=N`) remain the default for existing clients. Passing `cursor`
+(empty for the first page) switches to keyset pagination over (-start_date, id),
+which seeks through the composite index instead of counting and offsetting rows.
+"""
+
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ElectionCursorPagination(CursorPagination):
+    ordering = ("-start_date", "id")
+
+
+class ElectionPagination(PageNumberPagination):
+    """Page-number pagination that hands over to keyset pagination when `cursor` is given"""
+
+    cursor_pagination_class = ElectionCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if ElectionCursorPagination.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
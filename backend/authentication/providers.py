@@ -0,0 +1,161 @@
+"""Multi-endpoint JSON-RPC provider with pooled sessions, latency tracking and failover
+
+Each configured RPC URL gets its own keep-alive connection pool and health record.
+Reads are spread across healthy endpoints with probability inversely proportional
+to their observed latency, so faster providers take more of the load. Nonce-sensitive
+calls always try endpoints in configured order, keeping transaction sends on one
+node while it is healthy. An endpoint failing `failure_threshold` times in a row is
+skipped for `cooldown` seconds (circuit breaker).
+"""
+
+import random, threading, time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+from web3.providers import JSONBaseProvider
+
+# Methods that must stay on one node so nonces and sends are seen in order
+ORDERED_METHODS = {"eth_sendRawTransaction", "eth_getTransactionCount"}
+TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout, requests.HTTPError)
+# JSON-RPC error codes meaning "this node is overloaded", worth failing over
+RATE_LIMIT_CODES = {-32005, 429}
+LATENCY_SMOOTHING = 0.2
+MIN_LATENCY = 0.001
+
+
+class Endpoint:
+    """One RPC URL with its own pooled HTTP session and health statistics"""
+
+    def __init__(self, url: str, timeout: float, pool_size: int):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        self.url = url
+        self.provider = HTTPProvider(
+            url,
+            request_kwargs={"timeout": timeout},
+            session=session,
+            exception_retry_configuration=None,
+        )
+        self.latency = None  # exponentially weighted moving average, seconds
+        self.failures = 0
+        self.open_until = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    @property
+    def score(self) -> float:
+        # Endpoints without samples yet are tried first so they get measured
+        return self.latency if self.latency is not None else 0.0
+
+    def record_success(self, elapsed: float):
+        self.calls += 1
+        self.failures = 0
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += LATENCY_SMOOTHING * (elapsed - self.latency)
+
+    def record_failure(self, threshold: int, cooldown: float):
+        self.calls += 1
+        self.errors += 1
+        self.failures += 1
+        if self.failures >= threshold:
+            self.open_until = time.monotonic() + cooldown
+
+
+def _is_rate_limited(response) -> bool:
+    if isinstance(response, list):
+        return any(_is_rate_limited(r) for r in response)
+    error = response.get("error") if isinstance(response, dict) else None
+    return isinstance(error, dict) and error.get("code") in RATE_LIMIT_CODES
+
+
+class FailoverHTTPProvider(JSONBaseProvider):
+    """Routes JSON-RPC calls across several HTTP endpoints with failover"""
+
+    def __init__(
+        self,
+        urls: list[str],
+        timeout: float = 10.0,
+        pool_size: int = 20,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        **kwargs,
+    ):
+        if not urls:
+            raise ValueError("At least one RPC URL is required")
+        super().__init__(**kwargs)
+        self.endpoints = [Endpoint(url, timeout, pool_size) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"Failover RPC over {len(self.endpoints)} endpoints"
+
+    def _candidates(self, method: str) -> list[Endpoint]:
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.available]
+            if not healthy:
+                # Every circuit is open: probe all of them rather than fail outright
+                healthy = list(self.endpoints)
+            if method in ORDERED_METHODS or len(healthy) == 1:
+                return healthy
+            weights = [1.0 / max(e.score, MIN_LATENCY) for e in healthy]
+            first = random.choices(healthy, weights=weights)[0]
+            rest = sorted((e for e in healthy if e is not first), key=lambda e: e.score)
+            return [first] + rest
+
+    def _call(self, method: str, send):
+        last_error = last_response = None
+        for endpoint in self._candidates(method):
+            start = time.monotonic()
+            try:
+                response = send(endpoint.provider)
+            except TRANSPORT_ERRORS as e:
+                with self._lock:
+                    endpoint.record_failure(self.failure_threshold, self.cooldown)
+                last_error = e
+                continue
+            if _is_rate_limited(response):
+                with self._lock:
+                    endpoint.record_failure(self.failure_threshold, self.cooldown)
+                last_response = response
+                continue
+            with self._lock:
+                endpoint.record_success(time.monotonic() - start)
+            return response
+
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    def make_request(self, method, params):
+        return self._call(method, lambda provider: provider.make_request(method, params))
+
+    def make_batch_request(self, batch_requests):
+        method = batch_requests[0][0] if batch_requests else ""
+        return self._call(
+            method, lambda provider: provider.make_batch_request(batch_requests)
+        )
+
+    def stats(self) -> list[dict]:
+        """Per-endpoint health snapshot; URLs are reduced to scheme and host to hide API keys."""
+        with self._lock:
+            return [
+                {
+                    "endpoint": "{0.scheme}://{0.netloc}".format(urlsplit(e.url)),
+                    "available": e.available,
+                    "latency_ms": None if e.latency is None else e.latency * 1000,
+                    "calls": e.calls,
+                    "errors": e.errors,
+                }
+                for e in self.endpoints
+            ]
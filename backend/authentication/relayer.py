@@ -0,0 +1,311 @@
+"""Outbox of votes waiting for on-chain submission by the relayer worker"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from eth_abi import is_encodable
+
+from .models import Voter, VoteTransaction, RelayerLane
+from .lanes import pick_lane, lane_failed, lane_recovered
+from .client import (
+    get_receipt,
+    nonce_manager_for,
+    mark_voted_and_count_batch,
+    counted_voter_keys,
+    has_voted_many,
+    current_fees,
+    bumped_fees,
+)
+
+
+def enqueue_vote(election_id: int, voter_key_hex: str, choice_id: int) -> VoteTransaction:
+    """Stores a vote in the outbox; the relayer worker submits it later."""
+    return VoteTransaction.objects.create(
+        election_id=election_id, voter_key=voter_key_hex, choice_id=choice_id
+    )
+
+
+BACKLOG_CACHE_KEY = "relayer:backlog"
+
+
+def queue_backlog() -> int:
+    """Counts votes queued or sent but not yet confirmed, refreshed once per second."""
+    cache = caches[settings.CHAIN_CACHE_ALIAS]
+    backlog = cache.get(BACKLOG_CACHE_KEY)
+    if backlog is None:
+        backlog = VoteTransaction.objects.filter(
+            status__in=[VoteTransaction.STATUS_QUEUED, VoteTransaction.STATUS_SENT]
+        ).count()
+        cache.set(BACKLOG_CACHE_KEY, backlog, 1)
+    return backlog
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before a vote whose send failed `attempts` times is sent again."""
+    return min(
+        settings.RELAYER_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.RELAYER_RETRY_MAX_SECONDS,
+    )
+
+
+def is_valid_vote(vote: VoteTransaction) -> bool:
+    """Whether the vote encodes as (uint256, bytes32, uint256) batch arguments."""
+    try:
+        key = bytes.fromhex(vote.voter_key.removeprefix("0x"))
+    except (AttributeError, ValueError):
+        return False
+    return (
+        len(key) == 32
+        and is_encodable("uint256", vote.election_id)
+        and is_encodable("uint256", vote.choice_id)
+    )
+
+
+def _release_voters(votes: list[VoteTransaction]):
+    keys_by_election = {}
+    for vote in votes:
+        keys_by_election.setdefault(vote.election_id, []).append(vote.voter_key)
+    for election_id, keys in keys_by_election.items():
+        Voter.objects.filter(election_id=election_id, voter_key__in=keys).update(
+            has_voted=False
+        )
+
+
+def fail_votes(votes: list[VoteTransaction], error: str):
+    """Fails votes for good and releases their voters' claims in one transaction,
+    so each voter may cast the vote again.
+    """
+    with transaction.atomic():
+        VoteTransaction.objects.filter(pk__in=[v.id for v in votes]).update(
+            status=VoteTransaction.STATUS_FAILED, error=error, updated_at=timezone.now()
+        )
+        _release_voters(votes)
+
+
+def submit_queued(batch_size: int | None = None, window: float | None = None) -> int:
+    """Sends queued votes in insertion order, one batch transaction per nonce.
+
+    A batch is sent once it is full or its oldest vote waited `window` seconds,
+    from the least loaded relayer lane. Votes that cannot be encoded are failed
+    alone before the batch is sent. Stops at the first send error: the lane is
+    paused and its counter resynced with the chain, and the batch stays queued
+    until its retry_delay() has passed.
+    """
+    batch_size = batch_size or settings.RELAYER_BATCH_SIZE
+    if window is None:
+        window = settings.RELAYER_BATCH_WINDOW_SECONDS
+
+    sent = 0
+    while True:
+        now = timezone.now()
+        batch = list(
+            VoteTransaction.objects.filter(status=VoteTransaction.STATUS_QUEUED)
+            .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+            .order_by("id")
+            .only(
+                "id", "election_id", "voter_key", "choice_id", "attempts", "created_at"
+            )[:batch_size]
+        )
+        if not batch:
+            break
+        invalid = [v for v in batch if not is_valid_vote(v)]
+        if invalid:
+            fail_votes(invalid, "Vote cannot be encoded for the contract")
+            continue
+        if len(batch) < batch_size and (
+            now - batch[0].created_at < timedelta(seconds=window)
+        ):
+            break
+
+        lane = pick_lane()
+        if lane is None:
+            break
+        lane_nonces = nonce_manager_for(lane.address)
+        rows = VoteTransaction.objects.filter(pk__in=[v.id for v in batch])
+        nonce = lane_nonces.reserve()
+        try:
+            fees = current_fees()
+            tx_hash = mark_voted_and_count_batch(
+                [(v.election_id, v.voter_key, v.choice_id) for v in batch],
+                nonce=nonce,
+                fees=fees,
+                sender=lane.address,
+            )
+        except Exception as e:
+            # Transport, RPC and lane errors say nothing about the votes themselves
+            lane_nonces.reset()
+            lane_failed(lane)
+            attempts = max(v.attempts for v in batch) + 1
+            rows.update(
+                attempts=F("attempts") + 1,
+                retry_at=timezone.now() + timedelta(seconds=retry_delay(attempts)),
+                error=str(e),
+                updated_at=timezone.now(),
+            )
+            break
+
+        lane_recovered(lane)
+        rows.update(
+            status=VoteTransaction.STATUS_SENT,
+            sender=lane.address,
+            nonce=nonce,
+            tx_hash=tx_hash,
+            max_fee_per_gas=fees["maxFeePerGas"],
+            max_priority_fee_per_gas=fees["maxPriorityFeePerGas"],
+            attempts=F("attempts") + 1,
+            retry_at=None,
+            error=None,
+            updated_at=timezone.now(),
+        )
+        sent += len(batch)
+    return sent
+
+
+def check_receipts(limit: int = 200) -> tuple[int, int]:
+    """Records the outcome of sent votes; returns (confirmed, failed) counts.
+
+    A reverted batch never fails for vote-level reasons (out of gas, lane not a
+    relayer), so its votes go back to the queue and the lane is paused. Keys the
+    contract skipped as already voted were counted by an earlier broadcast of the
+    same vote (voter keys are unique in the outbox) and are confirmed; any other
+    skipped vote is failed and its voter released.
+    """
+    confirmed = failed = 0
+    tx_hashes = (
+        VoteTransaction.objects.filter(status=VoteTransaction.STATUS_SENT)
+        .order_by("nonce")
+        .values_list("tx_hash", flat=True)
+        .distinct()[:limit]
+    )
+    for tx_hash in tx_hashes:
+        rows = VoteTransaction.objects.filter(
+            tx_hash=tx_hash, status=VoteTransaction.STATUS_SENT
+        )
+        mined_hash, receipt = _find_receipt(tx_hash, rows)
+        if receipt is None:
+            continue
+
+        now = timezone.now()
+        if receipt.status != 1:
+            senders = set(rows.values_list("sender", flat=True))
+            for lane in RelayerLane.objects.filter(address__in=senders):
+                lane_failed(lane)
+            rows.update(
+                status=VoteTransaction.STATUS_QUEUED,
+                sender=None,
+                nonce=None,
+                tx_hash=None,
+                replaced_tx_hashes=[],
+                max_fee_per_gas=None,
+                max_priority_fee_per_gas=None,
+                error=f"Transaction {mined_hash} reverted, requeued",
+                updated_at=now,
+            )
+            continue
+
+        counted = counted_voter_keys(receipt)
+        votes = list(rows.only("id", "election_id", "voter_key"))
+        skipped = [v for v in votes if v.voter_key.lower() not in counted]
+        voted = dict(
+            zip(
+                (v.id for v in skipped),
+                has_voted_many([v.voter_key for v in skipped]) if skipped else [],
+            )
+        )
+        failed_votes = []
+        for vote in votes:
+            if vote.voter_key.lower() in counted:
+                vote.status = VoteTransaction.STATUS_CONFIRMED
+                confirmed += 1
+            elif voted[vote.id]:
+                vote.status = VoteTransaction.STATUS_CONFIRMED
+                vote.error = "Counted by an earlier broadcast (skipped on-chain)"
+                confirmed += 1
+            else:
+                vote.status = VoteTransaction.STATUS_FAILED
+                vote.error = "Skipped on-chain but not recorded as voted"
+                failed_votes.append(vote)
+            vote.tx_hash = mined_hash
+            vote.block_number = receipt.blockNumber
+            vote.updated_at = now
+        with transaction.atomic():
+            VoteTransaction.objects.bulk_update(
+                votes, ["status", "error", "tx_hash", "block_number", "updated_at"]
+            )
+            _release_voters(failed_votes)
+        failed += len(failed_votes)
+    return confirmed, failed
+
+
+def _find_receipt(tx_hash: str, rows):
+    """Returns (hash, receipt) of whichever broadcast of this nonce was mined."""
+    receipt = get_receipt(tx_hash)
+    if receipt is not None:
+        return tx_hash, receipt
+    first = rows.only("replaced_tx_hashes").first()
+    for replaced in reversed(first.replaced_tx_hashes if first else []):
+        receipt = get_receipt(replaced)
+        if receipt is not None:
+            return replaced, receipt
+    return tx_hash, None
+
+
+def rebroadcast_stuck(deadline: float | None = None, limit: int = 20) -> int:
+    """Re-sends transactions pending for longer than `deadline` seconds under the
+    same nonce with bumped fees; returns the number of votes re-sent.
+    """
+    if deadline is None:
+        deadline = settings.RELAYER_REBROADCAST_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=deadline)
+    tx_hashes = (
+        VoteTransaction.objects.filter(
+            status=VoteTransaction.STATUS_SENT, updated_at__lt=cutoff
+        )
+        .order_by("nonce")
+        .values_list("tx_hash", flat=True)
+        .distinct()[:limit]
+    )
+
+    resent = 0
+    for tx_hash in tx_hashes:
+        rows = VoteTransaction.objects.filter(
+            tx_hash=tx_hash, status=VoteTransaction.STATUS_SENT
+        )
+        if _find_receipt(tx_hash, rows)[1] is not None:
+            continue  # mined, check_receipts records it
+        batch = list(rows.order_by("id"))
+        first = batch[0]
+        previous = current_fees()
+        if first.max_fee_per_gas:
+            previous = {
+                "maxFeePerGas": first.max_fee_per_gas,
+                "maxPriorityFeePerGas": first.max_priority_fee_per_gas,
+            }
+        fees = bumped_fees(previous)
+        if fees is None:
+            continue  # already at FEE_MAX_GWEI
+
+        try:
+            new_hash = mark_voted_and_count_batch(
+                [(v.election_id, v.voter_key, v.choice_id) for v in batch],
+                nonce=first.nonce,
+                fees=fees,
+                sender=first.sender,
+            )
+        except Exception as e:
+            # e.g. "nonce too low" when the original was mined meanwhile
+            rows.update(error=str(e))
+            continue
+        rows.update(
+            tx_hash=new_hash,
+            replaced_tx_hashes=first.replaced_tx_hashes + [tx_hash],
+            max_fee_per_gas=fees["maxFeePerGas"],
+            max_priority_fee_per_gas=fees["maxPriorityFeePerGas"],
+            error=None,
+            updated_at=timezone.now(),
+        )
+        resent += len(batch)
+    return resent
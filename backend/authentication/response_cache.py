@@ -0,0 +1,89 @@
+"""Response cache with conditional GET support for the public election endpoints
+
+Cached payloads are keyed by a version of the election data read from the database
+on every request (row counts and latest updated_at of Election and Choice) and by
+the last status boundary (a start or end date) that has passed, so saving or
+deleting a model, from any worker, or an election opening/closing moves every
+entry to a fresh key. queryset.update() on these models must set updated_at.
+"""
+
+import hashlib, json
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import Election
+
+
+def _cache():
+    return caches[settings.ELECTION_CACHE_ALIAS]
+
+
+def _state(now) -> tuple[str, float, float, float | None]:
+    """Returns (data version, last modification, last boundary passed, next
+    boundary) of the election data in one query; times are timestamps.
+    """
+    agg = Election.objects.aggregate(
+        election_count=Count("id", distinct=True),
+        choice_count=Count("choices"),
+        elections_changed=Max("updated_at"),
+        choices_changed=Max("choices__updated_at"),
+        started=Max("start_date", filter=Q(start_date__lte=now)),
+        ended=Max("end_date", filter=Q(end_date__lt=now)),
+        next_start=Min("start_date", filter=Q(start_date__gt=now)),
+        next_end=Min("end_date", filter=Q(end_date__gte=now)),
+    )
+    elections_changed, choices_changed = (
+        d.timestamp() if d else 0.0
+        for d in (agg["elections_changed"], agg["choices_changed"])
+    )
+    counts = f"{agg['election_count']}.{agg['choice_count']}"
+    version = f"{counts}.{elections_changed}.{choices_changed}"
+    passed = [d.timestamp() for d in (agg["started"], agg["ended"]) if d]
+    upcoming = [d.timestamp() for d in (agg["next_start"], agg["next_end"]) if d]
+    return (
+        version,
+        max(elections_changed, choices_changed),
+        max(passed, default=0.0),
+        min(upcoming, default=None),
+    )
+
+
+class CachedResponseMixin:
+    """Serves GET responses from the election cache with ETag/Last-Modified headers"""
+
+    def get(self, request, *args, **kwargs):
+        cache = _cache()
+        now = timezone.now()
+        version, changed, last_boundary, next_boundary = _state(now)
+        last_modified = int(max(changed, last_boundary))
+
+        query = sorted(request.query_params.lists())
+        digest = hashlib.sha1(repr((request.get_host(), request.path, query)).encode()).hexdigest()
+        key = f"elections:resp:{version}:{last_boundary}:{digest}"
+        entry = cache.get(key)
+        if entry is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = json.dumps(response.data, sort_keys=True, default=str)
+            etag = '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+            entry = (response.data, etag)
+            timeout = settings.ELECTION_CACHE_SECONDS
+            if next_boundary is not None:
+                timeout = max(1, min(timeout, int(next_boundary - now.timestamp())))
+            cache.set(key, entry, timeout)
+
+        data, etag = entry
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        ) or Response(data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        # Clients must revalidate, statuses change when an election opens or closes
+        patch_cache_control(response, no_cache=True)
+        return response
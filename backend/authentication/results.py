@@ -0,0 +1,41 @@
+"""Frozen results snapshots for elections whose polls have closed"""
+
+from django.utils import timezone
+
+from .models import Election, ElectionResult, VoteTransaction
+from .client import block_number as chain_head, get_choice_counts
+
+
+def unsettled_votes(election: Election) -> int:
+    """Counts the election's votes still waiting in the relayer outbox."""
+    return election.vote_transactions.filter(
+        status__in=[VoteTransaction.STATUS_QUEUED, VoteTransaction.STATUS_SENT]
+    ).count()
+
+
+def read_chain_counts(election: Election, choice_ids: list[int]) -> tuple[dict, int]:
+    """Reads per-choice counts pinned to the current block; returns (counts, block)."""
+    block_number = chain_head()
+    counts = get_choice_counts(election.id, choice_ids, block_identifier=block_number)
+    return counts, block_number
+
+
+def finalize_results(election: Election, choice_ids: list[int] | None = None) -> ElectionResult:
+    """Reads the final counts from the chain and stores them as the election's snapshot."""
+    if choice_ids is None:
+        choice_ids = list(election.choices.values_list("id", flat=True))
+    counts, block_number = read_chain_counts(election, choice_ids)
+    result, _ = ElectionResult.objects.update_or_create(
+        election=election,
+        defaults={
+            "counts": {str(k): v for k, v in counts.items()},
+            "total_votes": sum(counts.values()),
+            "block_number": block_number,
+            "finalized_at": timezone.now(),
+        },
+    )
+    return result
+
+
+def can_finalize(election: Election) -> bool:
+    return election.end_date < timezone.now() and unsettled_votes(election) == 0
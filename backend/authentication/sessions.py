@@ -0,0 +1,106 @@
+"""Voting session store: cache-first reads with write-through to the database
+
+Sessions are cached under their token until they expire, so the vote path
+normally skips the session query. Only the session's own fields are cached, never
+its election, whose dates an admin may change at any time. Every write goes to the
+database first and refreshes the cache once the transaction commits; the database
+remains the source of truth when an entry is missing.
+"""
+
+import copy, uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from .models import VotingSession
+
+
+class SessionStore:
+    """Looks up, creates and updates VotingSession rows through the cache"""
+
+    def _cache(self):
+        return caches[settings.VOTING_SESSION_CACHE_ALIAS]
+
+    def _key(self, session_id: str) -> str:
+        return f"session:{session_id}"
+
+    def _voter_key(self, election_id: int, pesel: str, address: str) -> str:
+        return f"session:voter:{election_id}:{pesel}:{address.lower()}"
+
+    def _remember(self, sess: VotingSession):
+        ttl = sess.seconds_left()
+        if ttl <= 0:
+            return
+        voter_key = self._voter_key(sess.election_id, sess.pesel, sess.public_address or "")
+        cached = copy.copy(sess)
+        cached._state = copy.copy(sess._state)
+        cached._state.fields_cache = {}  # drop the select_related election
+        self._cache().set_many(
+            {self._key(sess.session_id): cached, voter_key: sess.session_id}, ttl
+        )
+
+    def _matches(self, sess, election_id) -> bool:
+        return sess.is_verified and sess.election_id == int(election_id)
+
+    def get(self, session_id: str, election_id: int) -> VotingSession | None:
+        """Returns the verified session for the election, or None."""
+        sess = self._cache().get(self._key(session_id))
+        if sess is None:
+            sess = VotingSession.objects.filter(session_id=session_id).first()
+            if sess is None:
+                return None
+            self._remember(sess)
+        return sess if self._matches(sess, election_id) else None
+
+    async def aget(self, session_id: str, election_id: int) -> VotingSession | None:
+        sess = await self._cache().aget(self._key(session_id))
+        if sess is None:
+            sess = await VotingSession.objects.filter(session_id=session_id).afirst()
+            if sess is None:
+                return None
+            self._remember(sess)
+        return sess if self._matches(sess, election_id) else None
+
+    def find_valid(self, election_id: int, pesel: str, address: str) -> VotingSession | None:
+        """Returns the voter's unexpired session for this address, if any."""
+        session_id = self._cache().get(self._voter_key(election_id, pesel, address))
+        if session_id is not None:
+            sess = self.get(session_id, election_id)
+            if sess is not None and not sess.is_expired():
+                return sess
+        cutoff = timezone.now() - timedelta(seconds=VotingSession.LIFETIME_SECONDS)
+        sess = (
+            VotingSession.objects.filter(
+                election_id=election_id,
+                pesel=pesel,
+                public_address__iexact=address,
+                is_verified=True,
+                created_at__gt=cutoff,
+            )
+            .order_by("-created_at")
+            .first()
+        )
+        if sess is not None:
+            self._remember(sess)
+        return sess
+
+    def create(self, **fields) -> VotingSession:
+        sess = VotingSession.objects.create(session_id=uuid.uuid4().hex, **fields)
+        self._remember(sess)
+        return sess
+
+    def save(self, sess: VotingSession, update_fields: list[str]):
+        """Writes the session to the database and refreshes the cache on commit."""
+        sess.save(update_fields=update_fields)
+        transaction.on_commit(lambda: self._remember(sess))
+
+    def purge_expired(self) -> int:
+        """Bulk-deletes expired sessions; their cache entries expire on their own."""
+        cutoff = timezone.now() - timedelta(seconds=VotingSession.LIFETIME_SECONDS)
+        deleted, _ = VotingSession.objects.filter(created_at__lt=cutoff).delete()
+        return deleted
+
+
+session_store = SessionStore()
@@ -0,0 +1,82 @@
+"""Recovery of signer addresses from personal_sign (EIP-191) text signatures
+
+The native backend uses libsecp256k1 through coincurve when it is installed and
+falls back to eth_account otherwise. With SIGNATURE_RECOVERY_PROCESSES > 0 the
+recovery runs in a process pool so it does not hold the request thread's GIL.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import threading
+
+from django.conf import settings
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+
+try:
+    import coincurve
+except ImportError:  # optional native dependency
+    coincurve = None
+
+
+def _prefixed_hash(message: str) -> bytes:
+    data = message.encode("utf-8")
+    return keccak(b"\x19Ethereum Signed Message:\n" + str(len(data)).encode() + data)
+
+
+def recover_coincurve(message: str, signature: str) -> str:
+    sig = bytes(HexBytes(signature))
+    if len(sig) != 65:
+        raise ValueError("Signature must be 65 bytes long")
+    v = sig[64] - 27 if sig[64] >= 27 else sig[64]
+    if v not in (0, 1):
+        raise ValueError("Invalid signature recovery id")
+    public_key = coincurve.PublicKey.from_signature_and_message(
+        sig[:64] + bytes([v]), _prefixed_hash(message), hasher=None
+    )
+    return to_checksum_address(keccak(public_key.format(compressed=False)[1:])[-20:])
+
+
+def recover_eth_account(message: str, signature: str) -> str:
+    try:
+        return Account.recover_message(encode_defunct(text=message), signature=signature)
+    except Exception as e:
+        raise ValueError(f"Invalid signature: {e}") from e
+
+
+BACKENDS = {"eth_account": recover_eth_account}
+if coincurve is not None:
+    BACKENDS["coincurve"] = recover_coincurve
+
+
+def get_backend(name: str | None = None):
+    """Returns the recovery function for a backend name ('auto' picks the fastest)."""
+    name = name or settings.SIGNATURE_BACKEND
+    if name == "auto":
+        name = "coincurve" if "coincurve" in BACKENDS else "eth_account"
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Signature backend '{name}' is not available")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(processes: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=processes)
+        return _pool
+
+
+def recover_signer(message: str, signature: str) -> str:
+    """Returns the checksummed address that signed `message`; raises ValueError if malformed."""
+    recover = get_backend()
+    processes = settings.SIGNATURE_RECOVERY_PROCESSES
+    if processes > 0:
+        return _get_pool(processes).submit(recover, message, signature).result()
+    return recover(message, signature)
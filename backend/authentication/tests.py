@@ -0,0 +1,347 @@
+from datetime import timedelta
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from . import client
+from .backends import InMemoryChainBackend
+from .challenges import check_settings
+from .client import voter_key
+from .models import (
+    Election,
+    Choice,
+    Voter,
+    VoteTransaction,
+    RelayerLane,
+    AuthChallenge,
+)
+from .relayer import submit_queued, check_receipts
+from .views import record_vote
+from .sessions import session_store
+
+PESEL = "00000000001"
+CODE = "CODE"
+
+
+def sign(account, text: str) -> str:
+    return account.sign_message(encode_defunct(text=text)).signature.hex()
+
+
+@override_settings(THROTTLE_RATES={}, VOTE_MAX_BACKLOG=0)
+class CastVoteTests(TestCase):
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        now = timezone.now()
+        self.election = Election.objects.create(
+            name="E",
+            start_date=now - timedelta(hours=1),
+            end_date=now + timedelta(hours=1),
+        )
+        self.choice = Choice.objects.create(name="A", election=self.election)
+        self.voter = Voter.objects.create(
+            pesel=PESEL,
+            verification_code=CODE,
+            email="voter@example.com",
+            election=self.election,
+            voter_key=voter_key(PESEL, self.election.id, "stored-salt"),
+        )
+
+    def verify(self, account) -> dict:
+        response = self.client.post(
+            "/api/auth/challenge/",
+            {"address": account.address},
+            content_type="application/json",
+        )
+        nonce = response.json()["nonce"]
+        response = self.client.post(
+            "/api/auth/verify/",
+            {
+                "pesel": PESEL,
+                "code": CODE,
+                "election_id": self.election.id,
+                "address": account.address,
+                "signature": sign(account, nonce),
+                "nonce": nonce,
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def vote(self, account, session: dict, choice_id=None):
+        if choice_id is None:
+            choice_id = self.choice.id
+        message = f"vote:{self.election.id}:{choice_id}:{session['next_nonce']}"
+        return self.client.post(
+            f"/api/elections/{self.election.id}/vote/",
+            {
+                "session_token": session["session_token"],
+                "choice_id": choice_id,
+                "signature": sign(account, message),
+            },
+            content_type="application/json",
+        )
+
+    def test_vote_query_count(self):
+        account = Account.create()
+        session = self.verify(account)
+        # Session from the cache; in one transaction (savepoint here): claim UPDATE,
+        # stored voter key, outbox INSERT and session UPDATE
+        with self.assertNumQueries(6):
+            response = self.vote(account, session)
+        self.assertEqual(response.status_code, 200)
+        queued = VoteTransaction.objects.get()
+        self.assertEqual(queued.voter_key, self.voter.voter_key)
+        self.assertEqual(queued.status, VoteTransaction.STATUS_QUEUED)
+
+    def test_second_session_of_same_voter_gets_409(self):
+        # Two wallets verified as the same voter race for the voter row
+        first, second = Account.create(), Account.create()
+        first_session = self.verify(first)
+        second_session = self.verify(second)
+
+        self.assertEqual(self.vote(first, first_session).status_code, 200)
+        response = self.vote(second, second_session)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["detail"], "Already voted (local)")
+        self.assertEqual(VoteTransaction.objects.count(), 1)
+
+    def test_claim_lost_to_concurrent_request(self):
+        account = Account.create()
+        session = self.verify(account)
+        sess = session_store.get(session["session_token"], self.election.id)
+        # Another request claimed the row after this one loaded its session
+        Voter.objects.filter(pk=self.voter.pk).update(has_voted=True)
+
+        queued, error = record_vote(sess, self.choice.id)
+        self.assertIsNone(queued)
+        self.assertEqual(error, ("Already voted (local)", 409))
+        self.assertFalse(VoteTransaction.objects.exists())
+
+    def test_vote_already_in_outbox_gets_409(self):
+        account = Account.create()
+        session = self.verify(account)
+        VoteTransaction.objects.create(
+            election=self.election,
+            voter_key=self.voter.voter_key,
+            choice_id=self.choice.id,
+        )
+
+        response = self.vote(account, session)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["detail"], "Already voted (queued)")
+        # The claim is rolled back with the failed insert
+        self.voter.refresh_from_db()
+        self.assertFalse(self.voter.has_voted)
+
+    def test_invalid_choice_is_rejected_before_the_outbox(self):
+        other = Election.objects.create(
+            name="Other",
+            start_date=self.election.start_date,
+            end_date=self.election.end_date,
+        )
+        foreign = Choice.objects.create(name="B", election=other)
+        account = Account.create()
+        session = self.verify(account)
+
+        for choice_id in (-1, "abc", foreign.id, 10**30):
+            response = self.vote(account, session, choice_id)
+            self.assertEqual(response.status_code, 400, choice_id)
+            self.assertEqual(response.json()["detail"], "Invalid choice")
+        self.assertFalse(VoteTransaction.objects.exists())
+        self.voter.refresh_from_db()
+        self.assertFalse(self.voter.has_voted)
+
+        # The voter can still cast a valid vote afterwards
+        self.assertEqual(self.vote(account, session).status_code, 200)
+
+
+@override_settings(THROTTLE_RATES={})
+class ChallengeTests(TestCase):
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        now = timezone.now()
+        election = Election.objects.create(
+            name="E",
+            start_date=now - timedelta(hours=1),
+            end_date=now + timedelta(hours=1),
+        )
+        Voter.objects.create(
+            pesel=PESEL,
+            verification_code=CODE,
+            email="voter@example.com",
+            election=election,
+        )
+        self.account = Account.create()
+        self.fields = {
+            "pesel": PESEL,
+            "code": CODE,
+            "election_id": election.id,
+            "address": self.account.address,
+        }
+
+    def challenge(self) -> str:
+        response = self.client.post(
+            "/api/auth/challenge/",
+            {"address": self.account.address},
+            content_type="application/json",
+        )
+        return response.json()["nonce"]
+
+    def verify(self, nonce: str, send_nonce: bool = True):
+        data = {**self.fields, "signature": sign(self.account, nonce)}
+        if send_nonce:
+            data["nonce"] = nonce
+        return self.client.post(
+            "/api/auth/verify/", data, content_type="application/json"
+        )
+
+    def test_db_challenge_without_nonce_is_single_use(self):
+        nonce = self.challenge()
+        self.assertEqual(self.verify(nonce, send_nonce=False).status_code, 200)
+        response = self.verify(nonce, send_nonce=False)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "Challenge not found")
+
+    @override_settings(CHALLENGE_MODE="hmac")
+    def test_hmac_challenge_is_single_use(self):
+        nonce = self.challenge()
+        self.assertFalse(AuthChallenge.objects.exists())
+        self.assertEqual(self.verify(nonce, send_nonce=False).status_code, 403)
+        self.assertEqual(self.verify(nonce).status_code, 200)
+        response = self.verify(nonce)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["detail"], "Challenge already used")
+
+    @override_settings(CHALLENGE_MODE="hmac", DEBUG=False)
+    def test_hmac_mode_needs_a_shared_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            check_settings()
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                    "LOCATION": "redis://localhost:6379/0",
+                }
+            }
+        ):
+            check_settings()
+
+
+class ElectionCacheTests(TestCase):
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        now = timezone.now()
+        self.election = Election.objects.create(
+            name="E",
+            start_date=now - timedelta(hours=1),
+            end_date=now + timedelta(hours=1),
+        )
+        self.choice = Choice.objects.create(name="A", election=self.election)
+
+    def test_changes_made_elsewhere_retire_cached_responses(self):
+        url = f"/api/elections/{self.election.id}/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # No signal fires here, as for an edit made through another worker
+        Election.objects.filter(pk=self.election.pk).update(
+            name="Renamed", updated_at=timezone.now()
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "Renamed")
+
+        etag = response["ETag"]
+        Choice.objects.filter(pk=self.choice.pk).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["choices"], [])
+
+
+class UnreachableChainBackend(InMemoryChainBackend):
+    def send_votes(self, *args, **kwargs):
+        raise ConnectionError("RPC endpoint unreachable")
+
+
+@override_settings(RELAYER_BATCH_SIZE=10, RELAYER_BATCH_WINDOW_SECONDS=0)
+class RelayerTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.election = Election.objects.create(
+            name="E",
+            start_date=now - timedelta(hours=1),
+            end_date=now + timedelta(hours=1),
+        )
+        self.choice = Choice.objects.create(name="A", election=self.election)
+        self.voters = [
+            Voter.objects.create(
+                pesel=f"{n:011d}",
+                verification_code=CODE,
+                email=f"voter{n}@example.com",
+                election=self.election,
+                voter_key=voter_key(f"{n:011d}", self.election.id, "stored-salt"),
+                has_voted=True,
+            )
+            for n in range(3)
+        ]
+        self.addCleanup(client.set_backend, None)
+
+    def queue(self, voter, choice_id=None):
+        return VoteTransaction.objects.create(
+            election=self.election,
+            voter_key=voter.voter_key,
+            choice_id=self.choice.id if choice_id is None else choice_id,
+        )
+
+    def test_unencodable_vote_is_failed_alone_and_releases_its_voter(self):
+        client.set_backend(InMemoryChainBackend())
+        good = [self.queue(self.voters[0]), self.queue(self.voters[2])]
+        bad = self.queue(self.voters[1], choice_id=-1)
+
+        self.assertEqual(submit_queued(), 2)
+        self.assertEqual(check_receipts(), (2, 0))
+        for vote in good:
+            vote.refresh_from_db()
+            self.assertEqual(vote.status, VoteTransaction.STATUS_CONFIRMED)
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, VoteTransaction.STATUS_FAILED)
+        self.voters[1].refresh_from_db()
+        self.assertFalse(self.voters[1].has_voted)
+        self.voters[0].refresh_from_db()
+        self.assertTrue(self.voters[0].has_voted)
+
+        # The released voter may queue a new vote next to the failed one
+        self.queue(self.voters[1])
+        self.assertEqual(submit_queued(), 1)
+
+    def test_send_error_keeps_the_batch_queued_with_backoff(self):
+        client.set_backend(UnreachableChainBackend())
+        votes = [self.queue(voter) for voter in self.voters]
+
+        for _ in range(10):
+            self.assertEqual(submit_queued(), 0)
+            VoteTransaction.objects.update(retry_at=None)  # skip the backoff
+            RelayerLane.objects.update(paused_until=None)
+        for vote in votes:
+            vote.refresh_from_db()
+            self.assertEqual(vote.status, VoteTransaction.STATUS_QUEUED)
+            self.assertEqual(vote.attempts, 10)
+            self.assertIn("unreachable", vote.error)
+        self.assertFalse(Voter.objects.filter(has_voted=False).exists())
+
+        # Backed off until retry_at, then sent once the endpoint is reachable
+        submit_queued()
+        client.set_backend(InMemoryChainBackend())
+        RelayerLane.objects.update(paused_until=None)
+        self.assertEqual(submit_queued(), 0)
+        VoteTransaction.objects.update(retry_at=timezone.now())
+        self.assertEqual(submit_queued(), 3)
@@ -0,0 +1,77 @@
+"""Request throttling for the sign-in and vote endpoints
+
+Each endpoint scope has token buckets per client IP and per address (the session
+token stands in for the address on votes), configured in THROTTLE_RATES as
+"<capacity>/<period>". Buckets live in the THROTTLE_CACHE_ALIAS cache so all
+workers share them; updates are not atomic, so concurrent requests may overshoot
+a limit slightly. Votes are additionally refused while the relayer backlog is
+at VOTE_MAX_BACKLOG.
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from .relayer import queue_backlog
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str | None) -> tuple[int, int] | None:
+    """Parses "10/min" into (10, 60); empty rates disable the bucket."""
+    if not rate:
+        return None
+    capacity, period = rate.split("/")
+    return int(capacity), PERIODS[period.strip()[0]]
+
+
+def take_token(key: str, rate: str) -> float:
+    """Takes a token from the bucket; returns 0 or the seconds until one is available."""
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    cache = caches[settings.THROTTLE_CACHE_ALIAS]
+    now = time.time()
+    state = cache.get(key)
+    tokens = capacity
+    if state is not None:
+        tokens = min(capacity, state[0] + (now - state[1]) * refill)
+    if tokens < 1:
+        return (1 - tokens) / refill
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def throttle_wait(scope: str, idents: dict[str, str | None]) -> float:
+    """Checks the scope's buckets for the given {kind: identity}; returns the wait."""
+    rates = settings.THROTTLE_RATES.get(scope, {})
+    for kind, ident in idents.items():
+        rate = rates.get(kind)
+        if ident and parse_rate(rate):
+            wait = take_token(f"throttle:{scope}:{kind}:{ident}", rate)
+            if wait:
+                return wait
+    return 0
+
+
+def backlog_retry_after() -> int:
+    """Seconds a voter should wait while the relayer queue is full, else 0."""
+    if settings.VOTE_MAX_BACKLOG and queue_backlog() >= settings.VOTE_MAX_BACKLOG:
+        return settings.VOTE_BACKLOG_RETRY_AFTER
+    return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle applying the IP and address buckets of the view's throttle_scope"""
+
+    def allow_request(self, request, view):
+        data = request.data if hasattr(request.data, "get") else {}
+        address = data.get("address") or data.get("session_token")
+        self.wait_seconds = throttle_wait(
+            view.throttle_scope,
+            {"ip": self.get_ident(request), "address": str(address or "").lower()},
+        )
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,5 +1,6 @@
 """URL configurations for the authentication app, including election-related endpoints"""
 
+from django.conf import settings
 from django.urls import path
 from .views import (
     ElectionListView,
@@ -10,6 +11,12 @@ from .views import (
     ElectionResultsView,
 )
 
+if settings.ASYNC_VIEWS:
+    from .async_views import (
+        AsyncCastVoteView as CastVoteView,
+        AsyncElectionResultsView as ElectionResultsView,
+    )
+
 urlpatterns = [
     path("elections/", ElectionListView.as_view(), name="election-list"),
     path("elections/<int:pk>/", ElectionDetailView.as_view(), name="election-detail"),
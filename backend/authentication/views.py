@@ -4,17 +4,24 @@ from rest_framework import permissions
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from eth_account import Account
-from eth_account.messages import encode_defunct
-from datetime import datetime, time, timedelta
+from datetime import datetime, time
 from django.conf import settings
 from django.utils import timezone
+from django.db import IntegrityError, transaction
 from django.db.models import QuerySet
-import uuid, secrets
 
-from .models import Election, Voter, VotingSession, AuthChallenge
+from .models import Election, Voter, VotingSession
 from .serializers import ElectionListSerializer, ElectionDetailSerializer
-from .client import voter_key, has_voted_onchain, mark_voted_and_count, contract
+from .client import voter_key, get_choice_counts
+from .relayer import enqueue_vote
+from .signatures import recover_signer
+from .challenges import issue_challenge, check_challenge, consume_challenge
+from .sessions import session_store
+from .throttling import TokenBucketThrottle, backlog_retry_after
+from .results import can_finalize, finalize_results
+from .response_cache import CachedResponseMixin
+from .pagination import ElectionPagination
+from .metrics import stage
 
 
 def parse_date(d: str | None):
@@ -27,13 +34,71 @@ def parse_date(d: str | None):
         return None
 
 
-class ElectionListView(ListAPIView):
+def parse_choice_id(value) -> int | None:
+    """Returns the choice id as a non-negative int, or None if it is not one."""
+    if isinstance(value, bool):
+        return None
+    try:
+        choice_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return choice_id if choice_id >= 0 else None
+
+
+def record_vote(sess: VotingSession, choice_id: int):
+    """Claims the voter row, queues the vote under the voter key stored on that row
+    and advances the session nonce atomically.
+
+    Returns (vote_transaction, None) or (None, (detail, http_status)).
+    """
+    try:
+        with transaction.atomic():
+            # Conditional UPDATE claims the voter row while the election is open
+            # (dates read fresh, not from the cached session) and the choice is on
+            # its ballot, so an invalid id never reaches the relayer's batches; a
+            # concurrent request for the same voter matches zero rows and backs off
+            now = timezone.now()
+            voters = Voter.objects.filter(pesel=sess.pesel, election_id=sess.election_id)
+            claimed = voters.filter(
+                has_voted=False,
+                election__start_date__lte=now,
+                election__end_date__gte=now,
+                election__choices__id=choice_id,
+            ).update(has_voted=True)
+            if not claimed:
+                voter = voters.select_related("election").first()
+                if voter is None:
+                    return None, ("Voter not found", 404)
+                election = voter.election
+                if not (election.start_date <= now <= election.end_date):
+                    return None, ("Election not active", 400)
+                if not election.choices.filter(pk=choice_id).exists():
+                    return None, ("Invalid choice", 400)
+                return None, ("Already voted (local)", 409)
+
+            # The stored key is what rebuild_voter_keys maintains; compute it only
+            # for rows imported before keys were stored
+            vkey = voters.values_list("voter_key", flat=True).first() or voter_key(
+                sess.pesel, sess.election_id, settings.SECRET_SALT
+            )
+            queued = enqueue_vote(sess.election_id, vkey, choice_id)
+
+            sess.has_voted = True
+            sess.next_nonce = sess.next_nonce + 1
+            session_store.save(sess, ["has_voted", "next_nonce"])
+    except IntegrityError:
+        return None, ("Already voted (queued)", 409)
+    return queued, None
+
+
+class ElectionListView(CachedResponseMixin, ListAPIView):
     """View for listing elections with optional filtering by status and date range"""
 
     serializer_class = ElectionListSerializer
+    pagination_class = ElectionPagination
 
     def get_queryset(self) -> QuerySet[Election]:
-        qs = Election.objects.all().order_by("-start_date")
+        qs = Election.objects.all().order_by("-start_date", "id")
         now = timezone.now()
         status_param = (self.request.query_params.get("status") or "all").lower()
         if status_param == "active":
@@ -55,10 +120,10 @@ class ElectionListView(ListAPIView):
         return qs
 
 
-class ElectionDetailView(RetrieveAPIView):
+class ElectionDetailView(CachedResponseMixin, RetrieveAPIView):
     """View for retrieving detailed information about a specific election"""
 
-    queryset = Election.objects.all()
+    queryset = Election.objects.prefetch_related("choices")
     serializer_class = ElectionDetailSerializer
 
 
@@ -66,28 +131,25 @@ class ChallengeView(APIView):
     """View for generating a nonce challenge for a given address to sign"""
 
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "challenge"
 
     def post(self, request):
         address = (request.data.get("address") or "").strip()
         if not address:
             return Response({"detail": "address required"}, status=400)
 
-        AuthChallenge.purge_expired()
-        nonce = "evote:" + secrets.token_hex(16)
-        ch, _ = AuthChallenge.objects.update_or_create(
-            address=address.lower(),
-            defaults={
-                "nonce": nonce,
-                "expires_at": timezone.now() + timedelta(minutes=10),
-            },
-        )
-        return Response({"nonce": ch.nonce}, status=200)
+        with stage("challenge", "issue"):
+            nonce = issue_challenge(address)
+        return Response({"nonce": nonce}, status=200)
 
 
 class VerifyView(APIView):
     """Verify voter's identity by checking signed challenge and voter credentials"""
 
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "verify"
 
     def post(self, request):
         pesel = (request.data.get("pesel") or "").strip()
@@ -95,54 +157,62 @@ class VerifyView(APIView):
         election_id = request.data.get("election_id")
         address = (request.data.get("address") or "").strip()
         signature = (request.data.get("signature") or "").strip()
+        # Optional in the default "db" challenge mode, see challenges.py
+        nonce = (request.data.get("nonce") or "").strip()
 
         if not pesel or not code or not election_id or not address or not signature:
             return Response({"detail": "Missing fields"}, status=400)
 
-        try:
-            ch = AuthChallenge.objects.get(address=address.lower())
-        except AuthChallenge.DoesNotExist:
-            return Response({"detail": "Challenge not found"}, status=403)
-        if ch.expires_at < timezone.now():
-            return Response({"detail": "Challenge expired"}, status=403)
-
-        signer = Account.recover_message(
-            encode_defunct(text=ch.nonce), signature=signature
-        )
+        with stage("verify", "challenge"):
+            try:
+                nonce = check_challenge(address, nonce)
+            except ValueError as e:
+                return Response({"detail": str(e)}, status=403)
+
+        with stage("verify", "signature"):
+            try:
+                signer = recover_signer(nonce, signature)
+            except ValueError:
+                return Response({"detail": "Bad signature"}, status=403)
         if signer.lower() != address.lower():
             return Response({"detail": "Bad signature"}, status=403)
 
-        try:
-            voter = Voter.objects.get(
-                pesel=pesel, election_id=election_id, verification_code=code
-            )
-        except Voter.DoesNotExist:
-            return Response({"detail": "Invalid verification code"}, status=403)
-
-        sess = VotingSession.objects.create(
-            session_id=uuid.uuid4().hex,
-            pesel=pesel,
-            email=voter.email,
-            election_id=election_id,
-            public_address=address,
-            is_verified=True,
-            next_nonce=1,
-        )
-
-        try:
-            voter.is_authenticated = True
-            voter.save(update_fields=["is_authenticated"])
-        except Exception:
-            pass
+        with stage("verify", "voter"):
+            try:
+                voter = Voter.objects.select_related("election").get(
+                    pesel=pesel, election_id=election_id, verification_code=code
+                )
+            except Voter.DoesNotExist:
+                return Response({"detail": "Invalid verification code"}, status=403)
+
+        with stage("verify", "session"):
+            if not consume_challenge(address, nonce):
+                return Response({"detail": "Challenge already used"}, status=403)
+
+            # Verifying again with the same wallet resumes the session still in progress
+            sess = session_store.find_valid(election_id, pesel, address)
+            if sess is None:
+                sess = session_store.create(
+                    pesel=pesel,
+                    email=voter.email,
+                    election=voter.election,
+                    public_address=address,
+                    is_verified=True,
+                    next_nonce=1,
+                )
 
-        ch.delete()
+            try:
+                voter.is_authenticated = True
+                voter.save(update_fields=["is_authenticated"])
+            except Exception:
+                pass
 
         return Response(
             {
                 "session_token": sess.session_id,
                 "public_address": address,
                 "next_nonce": sess.next_nonce,
-                "expires_in_seconds": 7200,
+                "expires_in_seconds": sess.seconds_left(),
             },
             status=200,
         )
@@ -152,6 +222,8 @@ class CastVoteView(APIView):
     """Cast a vote for a given choice in an election, verifying voter's session and signature"""
 
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenBucketThrottle]
+    throttle_scope = "vote"
 
     def post(self, request, election_id: int):
         session_token = request.data.get("session_token")
@@ -160,60 +232,48 @@ class CastVoteView(APIView):
 
         if not session_token or choice_id is None or not signature:
             return Response({"detail": "Missing fields"}, status=400)
-
-        try:
-            sess = VotingSession.objects.get(
-                session_id=session_token, election_id=election_id, is_verified=True
+        if parse_choice_id(choice_id) is None:
+            return Response({"detail": "Invalid choice"}, status=400)
+
+        with stage("vote", "backlog"):
+            retry_after = backlog_retry_after()
+        if retry_after:
+            return Response(
+                {"detail": "Too many votes in progress, try again later"},
+                status=503,
+                headers={"Retry-After": str(retry_after)},
             )
-        except VotingSession.DoesNotExist:
+
+        with stage("vote", "session"):
+            sess = session_store.get(session_token, election_id)
+        if sess is None:
             return Response({"detail": "Invalid session"}, status=403)
 
         if sess.is_expired():
             return Response({"detail": "Session expired"}, status=401)
 
-        try:
-            election = Election.objects.get(pk=election_id)
-        except Election.DoesNotExist:
-            return Response({"detail": "Election not found"}, status=404)
-
-        now = timezone.now()
-        if not (election.start_date <= now <= election.end_date):
-            return Response({"detail": "Election not active"}, status=400)
-
-        try:
-            voter = Voter.objects.get(pesel=sess.pesel, election_id=election_id)
-        except Voter.DoesNotExist:
-            return Response({"detail": "Voter not found"}, status=404)
-
-        if getattr(voter, "has_voted", False):
-            return Response({"detail": "Already voted (local)"}, status=409)
-
         message = f"vote:{election_id}:{choice_id}:{sess.next_nonce}"
-        signer = Account.recover_message(
-            encode_defunct(text=message), signature=signature
-        )
+        with stage("vote", "signature"):
+            try:
+                signer = recover_signer(message, signature)
+            except ValueError:
+                return Response({"detail": "Bad signature"}, status=403)
         if signer.lower() != (sess.public_address or "").lower():
             return Response({"detail": "Bad signature"}, status=403)
 
-        vkey = voter_key(sess.pesel, election_id, settings.SECRET_SALT)
-        if has_voted_onchain(vkey):
-            return Response({"detail": "Already voted on-chain"}, status=409)
-
-        tx_hash = mark_voted_and_count(election_id, vkey, int(choice_id))
-
-        sess.has_voted = True
-        sess.next_nonce = sess.next_nonce + 1
-        sess.save(update_fields=["has_voted", "next_nonce"])
-
-        try:
-            voter.has_voted = True
-            voter.save(update_fields=["has_voted"])
-        except Exception:
-            pass
+        # Double votes are rejected by the voter row claim, the outbox's unique voter
+        # key and, as a last resort, by the contract itself
+        with stage("vote", "record"):
+            queued, error = record_vote(sess, parse_choice_id(choice_id))
+        if error:
+            detail, status = error
+            return Response({"detail": detail}, status=status)
 
         return Response(
             {
-                "txHash": tx_hash,
+                "vote_id": queued.id,
+                "status": queued.status,
+                "txHash": queued.tx_hash,
                 "public_address": sess.public_address,
                 "next_nonce": sess.next_nonce,
             },
@@ -222,28 +282,47 @@ class CastVoteView(APIView):
 
 
 class ElectionResultsView(APIView):
-    """Returns per-choice counts for a given election by querying the smart contract"""
+    """Returns per-choice counts for a finished election
+
+    Served from the frozen snapshot once every vote is settled, otherwise read live
+    from the smart contract
+    """
 
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, election_id: int):
-        try:
-            election = Election.objects.get(pk=election_id)
-        except Election.DoesNotExist:
-            return Response({"detail": "Election not found"}, status=404)
-
-        now = timezone.now()
-        if election.end_date > now:
-            return Response({"detail": "Election not finished"}, status=400)
-
-        results = []
-        for choice in election.choices.all():
+        with stage("results", "election"):
             try:
-                count = contract.functions.getChoiceCount(election_id, choice.id).call()
-            except Exception as e:
-                return Response({"detail": f"Contract call failed: {e}"}, status=500)
-            results.append(
-                {"choice_id": choice.id, "name": choice.name, "votes": count}
-            )
+                election = Election.objects.select_related("result").get(pk=election_id)
+            except Election.DoesNotExist:
+                return Response({"detail": "Election not found"}, status=404)
+
+            now = timezone.now()
+            if election.end_date > now:
+                return Response({"detail": "Election not finished"}, status=400)
 
-        return Response({"results": results}, status=200)
+            choices = list(election.choices.all())
+        snapshot = getattr(election, "result", None)
+        try:
+            if snapshot is None:
+                with stage("results", "finalize"):
+                    if can_finalize(election):
+                        snapshot = finalize_results(election, [c.id for c in choices])
+            if snapshot is not None:
+                counts = {c.id: snapshot.count_for(c.id) for c in choices}
+            else:
+                with stage("results", "chain"):
+                    counts = get_choice_counts(election_id, [c.id for c in choices])
+        except Exception as e:
+            return Response({"detail": f"Contract call failed: {e}"}, status=500)
+
+        results = [
+            {"choice_id": choice.id, "name": choice.name, "votes": counts[choice.id]}
+            for choice in choices
+        ]
+
+        payload = {"results": results, "final": snapshot is not None}
+        if snapshot is not None:
+            payload["block_number"] = snapshot.block_number
+            payload["finalized_at"] = snapshot.finalized_at
+        return Response(payload, status=200)
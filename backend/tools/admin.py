@@ -1,3 +1,15 @@
 from django.contrib import admin
+from .models import MailingJob, InvitationDelivery
 
-# Register your models here.
+
+@admin.register(MailingJob)
+class MailingJobAdmin(admin.ModelAdmin):
+    list_display = ("election", "status", "total", "sent", "failed", "updated_at")
+    list_filter = ("status", "election")
+
+
+@admin.register(InvitationDelivery)
+class InvitationDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("voter", "job", "status", "created_at")
+    list_filter = ("status",)
+    search_fields = ("voter__email",)
@@ -1,28 +1,193 @@
-"""Module to send test emails to voters of a specific election"""
+"""Module to send invitation emails to voters of a specific election
 
-from django.core.mail import send_mass_mail
+Invitations go out as a MailingJob: voters are streamed from the database and
+sent in chunks over one reused SMTP connection, at most MAILING_RATE_PER_SECOND
+messages per second. Every voter gets an InvitationDelivery row as soon as their
+message is sent, so a job that was interrupted continues with the voters it has
+not reached yet. A job is leased by one worker at a time (see MailingJob).
+"""
+
+import os, smtplib, threading, time, uuid
+from datetime import timedelta
+from functools import cache
+from itertools import islice
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F, Q
 from django.template import Template, Context
+from django.utils import timezone
 from authentication.models import Election
-import os
+from tools.models import MailingJob, InvitationDelivery
 
 TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "basic_mail_template.txt")
 
-with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
-    email_template = f.read()
 
+class JobLeased(Exception):
+    """The job is being sent by another worker."""
+
+
+@cache
+def email_template() -> Template:
+    """Returns the invitation template, compiled once per process."""
+    with open(TEMPLATE_PATH, "r", encoding="utf-8") as f:
+        return Template(f.read())
+
+
+def unfinished_job(election_id: int, new: bool = False) -> MailingJob:
+    """Returns the election's unfinished job, creating one if there is none or `new`."""
+    with transaction.atomic():
+        # Row lock on the election so concurrent requests don't create two jobs
+        election = Election.objects.select_for_update().get(id=election_id)
+        job = None
+        if not new:
+            job = (
+                election.mailing_jobs.exclude(status=MailingJob.STATUS_DONE)
+                .order_by("-id")
+                .first()
+            )
+        if job is None:
+            job = MailingJob.objects.create(election=election)
+    return job
+
+
+def claim_job(job_id: int, worker: str) -> bool:
+    """Takes the job's lease unless another worker holds an unexpired one."""
+    now = timezone.now()
+    return bool(
+        MailingJob.objects.filter(id=job_id)
+        .exclude(status=MailingJob.STATUS_DONE)
+        .filter(
+            Q(lease_until__isnull=True) | Q(lease_until__lt=now) | Q(lease_owner=worker)
+        )
+        .update(
+            lease_owner=worker,
+            lease_until=now + timedelta(seconds=settings.MAILING_LEASE_SECONDS),
+        )
+    )
+
+
+def start_job(election_id: int) -> MailingJob:
+    """Starts or resumes the election's invitation job in a background thread.
+
+    Does nothing but return the job if another worker is already sending it.
+    """
+    job = unfinished_job(election_id)
+    worker = uuid.uuid4().hex
+    if claim_job(job.id, worker):
+        threading.Thread(
+            target=_run_in_thread, args=(job.id, worker), daemon=True
+        ).start()
+    return job
+
+
+def _run_in_thread(job_id: int, worker: str):
+    try:
+        run_job(job_id, worker=worker)
+    except JobLeased:
+        pass
+    finally:
+        db_connection.close()
+
+
+def run_job(
+    job_id: int,
+    chunk_size: int | None = None,
+    rate: float | None = None,
+    worker: str | None = None,
+):
+    """Sends the invitations of a job that are still missing; returns the job.
+
+    Raises JobLeased if another worker holds the job's lease (or takes it over).
+    """
+    chunk_size = chunk_size or settings.MAILING_CHUNK_SIZE
+    rate = settings.MAILING_RATE_PER_SECOND if rate is None else rate
+    worker = worker or uuid.uuid4().hex
+    if not claim_job(job_id, worker):
+        raise JobLeased(f"Mailing job {job_id} is being sent by another worker")
+    job = MailingJob.objects.select_related("election").get(id=job_id)
+    election = job.election
+    template = email_template()
+    subject = f"Invitation for: { election.name }"
+
+    pending = election.voters.exclude(invitations__job=job).only(
+        "id", "election_id", "email", "verification_code"
+    )
+    job.total = job.sent + job.failed + pending.count()
+    job.status = MailingJob.STATUS_RUNNING
+    job.error = ""
+    job.save(update_fields=["total", "status", "error", "updated_at"])
+    leased = MailingJob.objects.filter(id=job.id, lease_owner=worker)
 
-def send_mail(election_id):
-    election = Election.objects.get(id=election_id)
-    voters = election.voters.all()
-    messages = []
+    smtp = get_connection()
+    interval = 1 / rate if rate > 0 else 0
+    next_send = time.monotonic()
+    try:
+        smtp.open()
+        voters = pending.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(voters, chunk_size)):
+            for voter in chunk:
+                if interval:
+                    delay = next_send - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_send = max(next_send, time.monotonic()) + interval
+                body = template.render(Context({"election": election, "voter": voter}))
+                message = EmailMessage(subject, body, None, [voter.email])
+                delivery = _deliver(smtp, message, job, voter)
 
-    for voter in voters:
-        template = Template(email_template)
-        context = Context({"election": election, "voter": voter})
+                # Record the delivery right away and renew the lease with the counters
+                sent = delivery.status == InvitationDelivery.STATUS_SENT
+                with transaction.atomic():
+                    InvitationDelivery.objects.bulk_create(
+                        [delivery], ignore_conflicts=True
+                    )
+                    renewed = leased.update(
+                        sent=F("sent") + int(sent),
+                        failed=F("failed") + int(not sent),
+                        lease_until=timezone.now()
+                        + timedelta(seconds=settings.MAILING_LEASE_SECONDS),
+                    )
+                if not renewed:
+                    raise JobLeased(
+                        f"Mailing job {job.id} was taken over by another worker"
+                    )
+        job.status = MailingJob.STATUS_DONE
+    except JobLeased:
+        job.status = None
+        raise
+    except Exception as e:
+        job.status = MailingJob.STATUS_FAILED
+        job.error = str(e)
+        raise
+    finally:
+        smtp.close()
+        if job.status is not None:
+            leased.update(
+                status=job.status, error=job.error, lease_owner="", lease_until=None
+            )
+        job.refresh_from_db()
+    return job
 
-        subject = f"Invitation for: { election.name }"
-        message = template.render(context)
 
-        messages.append((subject, message, None, [voter.email]))
-    sent_count = send_mass_mail(messages, fail_silently=False)
-    return sent_count
+def _deliver(smtp, message, job, voter) -> InvitationDelivery:
+    """Sends one message, reconnecting once if the server dropped the connection."""
+    for attempt in range(2):
+        try:
+            smtp.send_messages([message])
+            return InvitationDelivery(
+                job=job, voter=voter, status=InvitationDelivery.STATUS_SENT
+            )
+        except smtplib.SMTPServerDisconnected:
+            if attempt:
+                raise
+            smtp.close()
+            smtp.open()
+        except (smtplib.SMTPException, ValueError) as e:
+            # Refused recipient or malformed address: record it and move on
+            return InvitationDelivery(
+                job=job,
+                voter=voter,
+                status=InvitationDelivery.STATUS_FAILED,
+                error=str(e),
+            )
@@ -0,0 +1,58 @@
+"""Micro-benchmark of the signature recovery backends"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from authentication.signatures import BACKENDS
+
+
+class Command(BaseCommand):
+    help = "Compare signature recovery backends (recoveries per second)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations", type=int, default=2000, help="Signatures per backend"
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            help="Also measure each backend through a process pool of this size",
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        processes = options["processes"]
+
+        account = Account.create()
+        samples = []
+        for i in range(iterations):
+            message = f"vote:1:{i % 7}:{i}"
+            signed = account.sign_message(encode_defunct(text=message))
+            samples.append((message, signed.signature.hex()))
+        messages = [m for m, _ in samples]
+        signatures = [s for _, s in samples]
+
+        self.stdout.write(f"{'Backend':<28} {'ops/s':>10} {'us/op':>10}")
+        for name, recover in BACKENDS.items():
+            start = time.perf_counter()
+            for message, signature in samples:
+                assert recover(message, signature) == account.address
+            self.report(name, time.perf_counter() - start, iterations)
+
+            if processes > 0:
+                with ProcessPoolExecutor(max_workers=processes) as pool:
+                    start = time.perf_counter()
+                    recovered = list(
+                        pool.map(recover, messages, signatures, chunksize=64)
+                    )
+                    elapsed = time.perf_counter() - start
+                assert all(addr == account.address for addr in recovered)
+                self.report(f"{name} (pool x{processes})", elapsed, iterations)
+
+    def report(self, name, elapsed, iterations):
+        self.stdout.write(
+            f"{name:<28} {iterations / elapsed:>10.0f} {elapsed / iterations * 1e6:>10.1f}"
+        )
@@ -0,0 +1,312 @@
+"""End-to-end load benchmark of the challenge -> verify -> vote flow
+
+Runs offline against the in-process ElectionManager simulation and the configured
+database: a throwaway election is created, N voters with deterministic keys sign in
+and vote concurrently through the real URLs and middleware (Django test client),
+and the latencies are written to a JSON report that can be compared across commits.
+Throttling and the relayer backlog cap are switched off for the run.
+"""
+
+import json, os, platform, random, subprocess, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from eth_utils import keccak
+
+from authentication import client as chain_client
+from authentication.backends import InMemoryChainBackend
+from authentication.client import voter_key
+from authentication.models import Election, Choice, Voter, VoteTransaction
+from authentication.relayer import submit_queued, check_receipts
+
+ENDPOINTS = ("challenge", "verify", "vote")
+CODE = "BENCH"
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Benchmark N concurrent voters through challenge, verify and vote (offline)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--voters", type=int, default=200, help="Simulated voters")
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Voters signing in at once"
+        )
+        parser.add_argument("--choices", type=int, default=3, help="Choices on the ballot")
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the voter keys and choices"
+        )
+        parser.add_argument(
+            "--output",
+            default="bench_voting.json",
+            help="JSON report path (default: bench_voting.json)",
+        )
+        parser.add_argument(
+            "--relay",
+            action="store_true",
+            help="Also drain the vote queue through the relayer into the simulated "
+            "contract (scratch databases only: relayer lanes are re-synced)",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the benchmark election afterwards"
+        )
+
+    def handle(self, *args, **options):
+        voters = options["voters"]
+        concurrency = options["concurrency"]
+        if voters < 1 or concurrency < 1 or options["choices"] < 1:
+            raise CommandError("--voters, --concurrency and --choices must be positive")
+        if options["relay"] and VoteTransaction.objects.exclude(
+            status__in=[VoteTransaction.STATUS_CONFIRMED, VoteTransaction.STATUS_FAILED]
+        ).exists():
+            # The relayer drains every election's queue, which must not go to the simulation
+            raise CommandError("--relay needs a database without votes awaiting the relayer")
+
+        # Never reach a real chain, whatever CHAIN_BACKEND says
+        chain_client.set_backend(InMemoryChainBackend())
+        election, ballots, accounts = self.setup(voters, options)
+        self.samples = {name: [] for name in ENDPOINTS}
+        self.queries = {name: 0 for name in ENDPOINTS}
+        self.errors = {name: {} for name in ENDPOINTS}
+        self.lock = threading.Lock()
+
+        self.stdout.write(
+            f"Election {election.id}: {voters} voters, concurrency {concurrency}"
+        )
+        try:
+            with override_settings(
+                THROTTLE_RATES={}, VOTE_MAX_BACKLOG=0, ALLOWED_HOSTS=["*"]
+            ):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    voted = sum(
+                        pool.map(
+                            lambda i: self.run_voter(
+                                election.id, i, accounts[i], ballots[i]
+                            ),
+                            range(voters),
+                        )
+                    )
+                elapsed = time.perf_counter() - start
+
+            report = self.report(election, voters, concurrency, voted, elapsed, options)
+            if options["relay"]:
+                report["relay"] = self.relay(election)
+        finally:
+            chain_client.set_backend(None)
+            if not options["keep"]:
+                election.delete()
+
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.print_report(report)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def setup(self, voters: int, options):
+        now = timezone.now()
+        election = Election.objects.create(
+            name=f"Benchmark {now:%Y-%m-%d %H:%M:%S}",
+            start_date=now - timedelta(minutes=1),
+            end_date=now + timedelta(days=1),
+        )
+        choices = Choice.objects.bulk_create(
+            Choice(name=f"Choice {n + 1}", election=election)
+            for n in range(options["choices"])
+        )
+        pesels = [f"{n:011d}" for n in range(voters)]
+        Voter.objects.bulk_create(
+            (
+                Voter(
+                    pesel=pesel,
+                    verification_code=CODE,
+                    email=f"bench{pesel}@example.com",
+                    election=election,
+                    voter_key=voter_key(pesel, election.id, settings.SECRET_SALT),
+                )
+                for pesel in pesels
+            ),
+            batch_size=1000,
+        )
+        seed = options["seed"]
+        accounts = [
+            Account.from_key(keccak(text=f"bench:{seed}:{n}")) for n in range(voters)
+        ]
+        rng = random.Random(seed)
+        ballots = [rng.choice(choices).id for _ in range(voters)]
+        return election, ballots, accounts
+
+    def run_voter(self, election_id: int, index: int, account, choice_id: int) -> bool:
+        """Signs one voter in and votes; returns whether the vote was accepted."""
+        http = Client()
+        try:
+            response = self.request(
+                http, "challenge", "/api/auth/challenge/", {"address": account.address}
+            )
+            if response.status_code != 200:
+                return False
+            nonce = response.json()["nonce"]
+            signature = account.sign_message(encode_defunct(text=nonce)).signature.hex()
+            response = self.request(
+                http,
+                "verify",
+                "/api/auth/verify/",
+                {
+                    "pesel": f"{index:011d}",
+                    "code": CODE,
+                    "election_id": election_id,
+                    "address": account.address,
+                    "signature": signature,
+                    "nonce": nonce,
+                },
+            )
+            if response.status_code != 200:
+                return False
+            session = response.json()
+            message = f"vote:{election_id}:{choice_id}:{session['next_nonce']}"
+            signature = account.sign_message(encode_defunct(text=message)).signature.hex()
+            response = self.request(
+                http,
+                "vote",
+                f"/api/elections/{election_id}/vote/",
+                {
+                    "session_token": session["session_token"],
+                    "choice_id": choice_id,
+                    "signature": signature,
+                },
+            )
+            return response.status_code == 200
+        finally:
+            connection.close()
+
+    def request(self, http: Client, endpoint: str, path: str, data: dict):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = http.post(path, data, content_type="application/json")
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.samples[endpoint].append(elapsed)
+            self.queries[endpoint] += queries[0]
+            if response.status_code != 200:
+                status = str(response.status_code)
+                self.errors[endpoint][status] = self.errors[endpoint].get(status, 0) + 1
+        return response
+
+    def report(self, election, voters, concurrency, voted, elapsed, options) -> dict:
+        endpoints = {}
+        for name in ENDPOINTS:
+            samples = sorted(self.samples[name])
+            endpoints[name] = {
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+                "max_ms": round(samples[-1] * 1000, 2) if samples else 0.0,
+                "db_queries_per_request": round(
+                    self.queries[name] / max(len(samples), 1), 2
+                ),
+            }
+        return {
+            "commit": git_commit(),
+            "timestamp": timezone.now().isoformat(),
+            "config": {
+                "voters": voters,
+                "concurrency": concurrency,
+                "choices": options["choices"],
+                "seed": options["seed"],
+                "database": connection.vendor,
+                "async_views": settings.ASYNC_VIEWS,
+                "signature_backend": settings.SIGNATURE_BACKEND,
+                "challenge_mode": settings.CHALLENGE_MODE,
+                "python": platform.python_version(),
+                "cpus": os.cpu_count(),
+            },
+            "elapsed_s": round(elapsed, 3),
+            "votes": voted,
+            "votes_per_s": round(voted / elapsed, 1),
+            "db_queries_per_vote": round(
+                sum(self.queries.values()) / max(voted, 1), 2
+            ),
+            "endpoints": endpoints,
+        }
+
+    def relay(self, election) -> dict:
+        """Submits the queued votes to the simulated contract and waits for receipts."""
+        pending = VoteTransaction.objects.filter(election=election).exclude(
+            status__in=[VoteTransaction.STATUS_CONFIRMED, VoteTransaction.STATUS_FAILED]
+        )
+        start = time.perf_counter()
+        rounds = 0
+        while pending.exists():
+            sent = submit_queued(window=0)
+            rounds += 1
+            confirmed, failed = check_receipts()
+            if not (sent or confirmed or failed):
+                break
+        elapsed = time.perf_counter() - start
+        rows = VoteTransaction.objects.filter(election=election)
+        confirmed = rows.filter(status=VoteTransaction.STATUS_CONFIRMED).count()
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "confirmed": confirmed,
+            "failed": rows.filter(status=VoteTransaction.STATUS_FAILED).count(),
+            "rounds": rounds,
+            "votes_per_s": round(confirmed / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def print_report(self, report: dict):
+        self.stdout.write(
+            f"{report['votes']} votes in {report['elapsed_s']}s "
+            f"({report['votes_per_s']} votes/s, "
+            f"{report['db_queries_per_vote']} DB queries per vote)"
+        )
+        self.stdout.write(
+            f"{'Endpoint':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'queries':>8} {'errors':>8}"
+        )
+        for name, stats in report["endpoints"].items():
+            self.stdout.write(
+                f"{name:<10} {stats['throughput_rps']:>8} {stats['p50_ms']:>8} "
+                f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+                f"{stats['db_queries_per_request']:>8} "
+                f"{sum(stats['errors'].values()):>8}"
+            )
+        if "relay" in report:
+            relay = report["relay"]
+            self.stdout.write(
+                f"Relayer: {relay['confirmed']} confirmed, {relay['failed']} failed "
+                f"in {relay['elapsed_s']}s ({relay['votes_per_s']} votes/s)"
+            )
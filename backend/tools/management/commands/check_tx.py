@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand, CommandError
-from authentication.client import w3
+from authentication.client import get_receipt
 
 
 class Command(BaseCommand):
@@ -16,9 +16,11 @@ class Command(BaseCommand):
         tx_hash = options['tx_hash']
         
         try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
+            receipt = get_receipt(tx_hash)
         except Exception as e:
             raise CommandError(f'Failed to get transaction receipt: {e}')
+        if receipt is None:
+            raise CommandError('Transaction is pending or unknown')
 
         self.stdout.write(self.style.SUCCESS('Transaction Receipt:'))
         self.stdout.write(f'  Status: {receipt.status} {"✓ Success" if receipt.status == 1 else "✗ Failed"}')
@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from authentication.client import contract, voter_key
+from authentication.client import has_voted_onchain, voter_key
+from authentication.models import Voter
 
 
 class Command(BaseCommand):
@@ -33,14 +34,18 @@ class Command(BaseCommand):
         except AttributeError:
             raise CommandError('SECRET_SALT not found in settings')
 
-        # Generate voter_key
-        vk = voter_key(pesel, election_id, salt)
+        # Stored key from the voter roll, computed for voters imported without one
+        vk = (
+            Voter.objects.filter(pesel=pesel, election_id=election_id)
+            .values_list('voter_key', flat=True)
+            .first()
+        ) or voter_key(pesel, election_id, salt)
 
         if show_key:
             self.stdout.write(f'Voter Key: {vk}')
 
         try:
-            has_voted = contract.functions.hasVoted(vk).call()
+            has_voted = has_voted_onchain(vk)
         except Exception as e:
             raise CommandError(f'Failed to check voting status: {e}')
 
@@ -0,0 +1,92 @@
+"""Freeze or verify the results snapshot of a finished election"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from authentication.models import Election, ElectionResult
+from authentication.results import unsettled_votes, finalize_results, read_chain_counts
+
+
+class Command(BaseCommand):
+    help = "Store (or verify) the final on-chain results of a finished election"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int, help="Election ID to finalize")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Compare the stored snapshot with the chain instead of rewriting it",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Finalize even if the election has not ended or votes are unsettled",
+        )
+
+    def handle(self, *args, **options):
+        election_id = options["election_id"]
+
+        try:
+            election = Election.objects.get(pk=election_id)
+        except Election.DoesNotExist:
+            raise CommandError(f"Election with ID {election_id} not found")
+
+        if options["verify"]:
+            self.verify(election)
+            return
+
+        if not options["force"]:
+            if election.end_date > timezone.now():
+                raise CommandError(f"Election #{election_id} has not ended yet")
+            pending = unsettled_votes(election)
+            if pending:
+                raise CommandError(
+                    f"Election #{election_id} still has {pending} unsettled votes"
+                )
+
+        try:
+            result = finalize_results(election)
+        except Exception as e:
+            raise CommandError(f"Failed to read results from chain: {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Election #{election_id} finalized at block {result.block_number}: "
+                f"{result.total_votes} votes"
+            )
+        )
+
+    def verify(self, election):
+        try:
+            result = election.result
+        except ElectionResult.DoesNotExist:
+            raise CommandError(f"Election #{election.id} has no results snapshot")
+
+        choice_ids = list(election.choices.values_list("id", flat=True))
+        try:
+            counts, block_number = read_chain_counts(election, choice_ids)
+        except Exception as e:
+            raise CommandError(f"Failed to read results from chain: {e}")
+
+        mismatches = [
+            (choice_id, result.count_for(choice_id), votes)
+            for choice_id, votes in counts.items()
+            if result.count_for(choice_id) != votes
+        ]
+        if not mismatches:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Snapshot of election #{election.id} matches the chain at block {block_number}"
+                )
+            )
+            return
+
+        for choice_id, stored, onchain in mismatches:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Choice {choice_id}: snapshot {stored}, chain {onchain}"
+                )
+            )
+        raise CommandError(
+            f"Snapshot of election #{election.id} differs from the chain "
+            f"(run without --verify to re-finalize)"
+        )
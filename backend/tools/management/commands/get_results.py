@@ -2,8 +2,9 @@
 
 import json
 from django.core.management.base import BaseCommand, CommandError
-from authentication.models import Election
-from authentication.client import contract
+from django.db.models import Count
+from authentication.models import Election, VoteEvent
+from authentication.client import get_choice_counts
 
 
 class Command(BaseCommand):
@@ -19,6 +20,11 @@ class Command(BaseCommand):
         parser.add_argument(
             "--verbose", action="store_true", help="Show detailed information"
         )
+        parser.add_argument(
+            "--indexed",
+            action="store_true",
+            help="Tally indexed VoteCast events (see index_votes) instead of querying the contract",
+        )
 
     def handle(self, *args, **options):
         election_id = options["election_id"]
@@ -38,19 +44,24 @@ class Command(BaseCommand):
             )
             return
 
-        results = []
-        total_votes = 0
-
-        for choice in choices:
+        if options["indexed"]:
+            tally = dict(
+                VoteEvent.objects.filter(election_id=election_id)
+                .values_list("choice_id")
+                .annotate(votes=Count("id"))
+            )
+            counts = {c.id: tally.get(c.id, 0) for c in choices}
+        else:
             try:
-                count = contract.functions.getChoiceCount(election_id, choice.id).call()
+                counts = get_choice_counts(election_id, [c.id for c in choices])
             except Exception as e:
-                raise CommandError(f"Failed to get count for choice {choice.id}: {e}")
+                raise CommandError(f"Failed to get choice counts: {e}")
 
-            results.append(
-                {"choice_id": choice.id, "name": choice.name, "votes": count}
-            )
-            total_votes += count
+        results = [
+            {"choice_id": choice.id, "name": choice.name, "votes": counts[choice.id]}
+            for choice in choices
+        ]
+        total_votes = sum(r["votes"] for r in results)
 
         if as_json:
             output = {
@@ -0,0 +1,47 @@
+"""Index VoteCast events from the blockchain into the local database"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from authentication.indexer import sync_vote_events
+
+
+class Command(BaseCommand):
+    help = "Copy VoteCast logs into the VoteEvent table, resuming from the last checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--follow", action="store_true", help="Keep polling for new blocks"
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=12.0,
+            help="Seconds between polls in --follow mode",
+        )
+        parser.add_argument(
+            "--reorg-depth",
+            type=int,
+            default=None,
+            help="Blocks re-scanned on each run (default: INDEXER_REORG_DEPTH)",
+        )
+        parser.add_argument(
+            "--max-range",
+            type=int,
+            default=None,
+            help="Largest eth_getLogs block range (default: INDEXER_MAX_BLOCK_RANGE)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                stored = sync_vote_events(options["reorg_depth"], options["max_range"])
+            except Exception as e:
+                if not options["follow"]:
+                    raise CommandError(f"Failed to index vote events: {e}")
+                self.stderr.write(f"Indexing failed, retrying: {e}")
+            else:
+                self.stdout.write(f"Indexed {stored} vote events")
+
+            if not options["follow"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,34 @@
+"""Periodic sweeper deleting expired authentication rows"""
+
+import time
+from django.core.management.base import BaseCommand
+from authentication.models import AuthChallenge
+from authentication.sessions import session_store
+
+
+class Command(BaseCommand):
+    help = "Delete expired voting sessions and authentication challenges, once or periodically"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=300.0,
+            help="Seconds to sleep between sweeps",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Run a single sweep and exit"
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sessions = session_store.purge_expired()
+            challenges = AuthChallenge.purge_expired()
+            if sessions or challenges:
+                self.stdout.write(
+                    f"Purged sessions: {sessions}  Challenges: {challenges}"
+                )
+
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,76 @@
+"""Recompute the stored voter keys, e.g. after rotating SECRET_SALT
+
+Keys already recorded on-chain were derived from the old salt, so rotate it only
+for elections that have not started voting yet.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby, islice
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from authentication.client import voter_keys
+from authentication.models import Voter, Election
+
+
+class Command(BaseCommand):
+    help = "Recompute Voter.voter_key from SECRET_SALT in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--election-id",
+            type=int,
+            default=None,
+            help="Only rebuild keys of this election (default: all elections)",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=5000, help="Voters updated per query"
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            help="Worker processes computing the keys",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Only fill in voters without a stored key",
+        )
+
+    def handle(self, *args, **options):
+        voters = Voter.objects.order_by("election_id", "id")
+        if options["election_id"] is not None:
+            if not Election.objects.filter(pk=options["election_id"]).exists():
+                raise CommandError(
+                    f"Election with id {options['election_id']} does not exist"
+                )
+            voters = voters.filter(election_id=options["election_id"])
+        if options["missing_only"]:
+            voters = voters.filter(voter_key="")
+
+        chunk_size = options["chunk_size"]
+        executor = None
+        if options["processes"] > 1:
+            executor = ProcessPoolExecutor(max_workers=options["processes"])
+
+        updated = 0
+        try:
+            rows = voters.values_list("id", "pesel", "election_id").iterator(
+                chunk_size=chunk_size
+            )
+            while chunk := list(islice(rows, chunk_size)):
+                batch = []
+                for election_id, group in groupby(chunk, key=lambda r: r[2]):
+                    group = list(group)
+                    keys = voter_keys(
+                        [r[1] for r in group], election_id, settings.SECRET_SALT, executor
+                    )
+                    batch += [Voter(id=r[0], voter_key=k) for r, k in zip(group, keys)]
+                Voter.objects.bulk_update(batch, ["voter_key"])
+                updated += len(batch)
+                self.stdout.write(f"Updated: {updated}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {updated} voter keys"))
@@ -0,0 +1,169 @@
+"""Reconcile an election's voter roll and vote outbox with the chain"""
+
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from authentication.client import (
+    block_number,
+    counted_voter_keys,
+    get_receipt,
+    has_voted_many,
+    voter_key,
+)
+from authentication.models import Election, Voter, VoteTransaction
+
+# Outbox states in which a local has_voted flag is expected before the chain agrees
+IN_FLIGHT = (VoteTransaction.STATUS_QUEUED, VoteTransaction.STATUS_SENT)
+
+
+class Command(BaseCommand):
+    help = "Compare local vote flags and recorded transactions with the chain and report mismatches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int)
+        parser.add_argument(
+            "--batch-size", type=int, default=200, help="hasVoted calls per JSON-RPC batch"
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=4, help="RPC requests in flight at once"
+        )
+        parser.add_argument(
+            "--report",
+            type=str,
+            default=None,
+            help="CSV mismatch report path (default: reconcile_<election>_<timestamp>.csv)",
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Fix local flags: set has_voted from the chain, clear it (and drop the "
+            "failed outbox row) where the vote never landed, and fail confirmed rows "
+            "the chain did not count",
+        )
+
+    def handle(self, *args, **options):
+        election_id = options["election_id"]
+        try:
+            election = Election.objects.get(pk=election_id)
+        except Election.DoesNotExist:
+            raise CommandError(f"Election with id {election_id} does not exist")
+
+        batch_size = options["batch_size"]
+        block = block_number()  # every read sees the same chain state
+        self.stdout.write(f"Reconciling election {election.id} at block {block}")
+
+        outbox = {
+            key.lower(): status
+            for key, status in VoteTransaction.objects.filter(
+                election=election
+            ).values_list("voter_key", "status")
+        }
+        mismatches = []
+        checked = 0
+        voters = (
+            election.voters.order_by("id")
+            .values_list("id", "pesel", "voter_key", "has_voted")
+            .iterator(chunk_size=batch_size * options["concurrency"])
+        )
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            while chunk := list(islice(voters, batch_size * options["concurrency"])):
+                rows = [
+                    (vid, (key or voter_key(pesel, election.id, settings.SECRET_SALT)).lower(), voted)
+                    for vid, pesel, key, voted in chunk
+                ]
+                batches = [rows[i : i + batch_size] for i in range(0, len(rows), batch_size)]
+                results = pool.map(
+                    lambda b: has_voted_many([r[1] for r in b], block), batches
+                )
+                for batch, onchain in zip(batches, results):
+                    for (vid, key, voted), chain_voted in zip(batch, onchain):
+                        status = outbox.get(key)
+                        if chain_voted and not voted:
+                            mismatches.append((vid, key, "chain_only", status or ""))
+                        elif voted and not chain_voted and status not in IN_FLIGHT:
+                            mismatches.append((vid, key, "local_only", status or ""))
+                checked += len(rows)
+                self.stdout.write(f"Voters checked: {checked}")
+
+            receipt_mismatches = self.check_receipts(election, pool)
+
+        report = options["report"] or (
+            f"reconcile_{election.id}_{timezone.now():%Y%m%d%H%M%S}.csv"
+        )
+        with open(report, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["voter_id", "voter_key", "issue", "outbox_status"])
+            writer.writerows(mismatches)
+            writer.writerows(receipt_mismatches)
+
+        counts = {}
+        for row in mismatches + receipt_mismatches:
+            counts[row[2]] = counts.get(row[2], 0) + 1
+        summary = "  ".join(f"{k}: {v}" for k, v in sorted(counts.items())) or "none"
+        self.stdout.write(f"Mismatches: {summary}. Report written to {report}")
+
+        if options["repair"]:
+            self.repair(election, mismatches, receipt_mismatches)
+
+    def check_receipts(self, election, pool):
+        """Checks recorded transactions; returns rows for votes the chain disagrees with."""
+        rows = VoteTransaction.objects.filter(
+            election=election,
+            status__in=[VoteTransaction.STATUS_SENT, VoteTransaction.STATUS_CONFIRMED],
+        ).exclude(tx_hash=None)
+        by_hash = {}
+        for vote_id, key, status, tx_hash in rows.values_list(
+            "id", "voter_key", "status", "tx_hash"
+        ):
+            by_hash.setdefault(tx_hash, []).append((vote_id, key.lower(), status))
+
+        hashes = list(by_hash)
+        mismatches = []
+        for tx_hash, receipt in zip(hashes, pool.map(get_receipt, hashes)):
+            counted = set()
+            if receipt is not None and receipt["status"] == 1:
+                counted = counted_voter_keys(receipt)
+            for vote_id, key, status in by_hash[tx_hash]:
+                if status == VoteTransaction.STATUS_CONFIRMED and key not in counted:
+                    mismatches.append(("", key, "confirmed_not_counted", status))
+                elif status == VoteTransaction.STATUS_SENT and receipt is not None:
+                    # check_receipts in the relayer records these on its next round
+                    mismatches.append(("", key, "sent_already_mined", status))
+        self.stdout.write(f"Transactions checked: {len(hashes)}")
+        return mismatches
+
+    def repair(self, election, mismatches, receipt_mismatches):
+        chain_only = [vid for vid, _, issue, _ in mismatches if issue == "chain_only"]
+        local_only = [(vid, key) for vid, key, issue, _ in mismatches if issue == "local_only"]
+        not_counted = [key for _, key, issue, _ in receipt_mismatches if issue == "confirmed_not_counted"]
+
+        with transaction.atomic():
+            Voter.objects.filter(id__in=chain_only).update(has_voted=True)
+            Voter.objects.filter(id__in=[vid for vid, _ in local_only]).update(
+                has_voted=False
+            )
+            VoteTransaction.objects.filter(
+                election=election, voter_key__in=not_counted
+            ).update(
+                status=VoteTransaction.STATUS_FAILED,
+                error="Not counted on-chain (reconcile_votes)",
+                updated_at=timezone.now(),
+            )
+            # The voter may vote again; the unique voter key would reject a new outbox row
+            VoteTransaction.objects.filter(
+                election=election,
+                voter_key__in=[key for _, key in local_only],
+                status=VoteTransaction.STATUS_FAILED,
+            ).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Repaired: has_voted set {len(chain_only)}, cleared {len(local_only)}, "
+                f"outbox rows failed {len(not_counted)}"
+            )
+        )
@@ -0,0 +1,60 @@
+"""Inspect and manage the relayer lanes (accounts submitting votes)"""
+
+from django.core.management.base import BaseCommand, CommandError
+from authentication.client import get_backend
+from authentication.lanes import check_lanes, lane_loads
+from authentication.models import RelayerLane
+
+
+class Command(BaseCommand):
+    help = "Show relayer lanes, authorize them on-chain or enable/disable them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--authorize",
+            action="store_true",
+            help="Send setRelayer(address, true) from the owner for configured lanes the contract does not accept yet",
+        )
+        parser.add_argument(
+            "--revoke",
+            type=str,
+            default=None,
+            metavar="ADDRESS",
+            help="Send setRelayer(address, false) from the owner",
+        )
+        parser.add_argument("--enable", type=str, default=None, metavar="ADDRESS")
+        parser.add_argument("--disable", type=str, default=None, metavar="ADDRESS")
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+
+        if options["authorize"]:
+            for address in backend.relayer_addresses:
+                if not backend.is_relayer(address):
+                    tx_hash = backend.set_relayer(address, True)
+                    self.stdout.write(f"Authorizing {address}: {tx_hash}")
+        if options["revoke"]:
+            tx_hash = backend.set_relayer(options["revoke"], False)
+            self.stdout.write(f"Revoking {options['revoke']}: {tx_hash}")
+
+        for flag, enabled in (("enable", True), ("disable", False)):
+            if options[flag]:
+                updated = RelayerLane.objects.filter(address=options[flag]).update(
+                    enabled=enabled,
+                    disabled_reason="" if enabled else RelayerLane.REASON_MANUAL,
+                )
+                if not updated:
+                    raise CommandError(f"Unknown lane {options[flag]}")
+
+        for change in check_lanes():
+            self.stdout.write(self.style.WARNING(change))
+
+        lanes = list(RelayerLane.objects.order_by("id"))
+        loads = lane_loads([lane.address for lane in lanes])
+        for lane in lanes:
+            state = "enabled" if lane.enabled else f"disabled ({lane.disabled_reason})"
+            balance = (lane.balance_wei or 0) / 10**18
+            self.stdout.write(
+                f"{lane.address}  {state}  balance: {balance:.6f} ETH  "
+                f"in flight: {loads.get(lane.address, 0)}  failures: {lane.failures}"
+            )
@@ -0,0 +1,60 @@
+"""Relayer worker submitting queued votes on-chain and tracking their receipts"""
+
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from authentication.lanes import check_lanes
+from authentication.relayer import submit_queued, check_receipts, rebroadcast_stuck
+
+
+class Command(BaseCommand):
+    help = "Submit queued votes on-chain through the relayer lanes (run a single worker)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep between polling rounds",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Maximum number of votes per transaction (default: RELAYER_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--window",
+            type=float,
+            default=None,
+            help="Seconds to collect votes before sending a partial batch "
+            "(default: RELAYER_BATCH_WINDOW_SECONDS)",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Run a single round and exit"
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        batch_size = options["batch_size"]
+        lanes_checked = 0.0
+
+        while True:
+            if time.monotonic() - lanes_checked >= settings.RELAYER_LANE_CHECK_SECONDS:
+                for change in check_lanes():
+                    self.stdout.write(self.style.WARNING(change))
+                lanes_checked = time.monotonic()
+
+            sent = submit_queued(batch_size, options["window"])
+            confirmed, failed = check_receipts()
+            resent = rebroadcast_stuck()
+
+            if sent or confirmed or failed or resent:
+                self.stdout.write(
+                    f"Sent: {sent}  Confirmed: {confirmed}  Failed: {failed}  "
+                    f"Rebroadcast: {resent}"
+                )
+
+            if options["once"]:
+                break
+            time.sleep(interval)
@@ -0,0 +1,44 @@
+"""Send (or resume sending) invitation emails for an election in the foreground"""
+
+from django.core.management.base import BaseCommand, CommandError
+from authentication.models import Election
+from tools.mailing.email import run_job, unfinished_job, JobLeased
+
+
+class Command(BaseCommand):
+    help = "Send invitation emails to an election's voters, resuming an unfinished job"
+
+    def add_arguments(self, parser):
+        parser.add_argument("election_id", type=int)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Voters per chunk (default: MAILING_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=None,
+            help="Maximum messages per second, 0 for no limit (default: MAILING_RATE_PER_SECOND)",
+        )
+        parser.add_argument(
+            "--new", action="store_true", help="Start a new job instead of resuming"
+        )
+
+    def handle(self, *args, **options):
+        election_id = options["election_id"]
+        try:
+            job = unfinished_job(election_id, new=options["new"])
+        except Election.DoesNotExist:
+            raise CommandError(f"Election with id {election_id} does not exist")
+
+        try:
+            job = run_job(job.id, options["chunk_size"], options["rate"])
+        except JobLeased as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Job {job.id}: sent {job.sent} of {job.total}, failed {job.failed}"
+            )
+        )
@@ -1,9 +1,24 @@
 """Create or update voters from a CSV file for a specific election"""
 
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from authentication.models import Voter, Election
+from authentication.client import voter_key, voter_keys
 
-import csv, random, string
+import csv, json, os, random, string
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+PESEL_WEIGHTS = (1, 3, 7, 9, 1, 3, 7, 9, 1, 3)
+
+
+def pesel_is_valid(pesel: str) -> bool:
+    """Checks the length and the control digit of a PESEL number."""
+    if len(pesel) != 11 or not pesel.isdigit():
+        return False
+    total = sum(int(d) * w for d, w in zip(pesel, PESEL_WEIGHTS))
+    return (10 - total % 10) % 10 == int(pesel[10])
 
 
 class Command(BaseCommand):
@@ -15,6 +30,44 @@ class Command(BaseCommand):
             action="store_true",
             help="Update email/verification_code for existing voter for this election",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Stream the CSV in chunks with bulk inserts/updates and PESEL validation",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows per chunk in --bulk mode",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="In --bulk mode, continue after the rows recorded in the checkpoint file",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default=None,
+            help="Checkpoint file for --bulk mode (default: <csv>.checkpoint)",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Make the election's voter roll match the CSV: add, update emails and delete missing voters",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="With --sync, only report what would change",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=0,
+            help="Worker processes computing voter keys in --bulk/--sync mode",
+        )
 
     def handle(self, *args, **options):
         voting_id = options["voting_id"]
@@ -25,6 +78,20 @@ class Command(BaseCommand):
         except Election.DoesNotExist:
             raise CommandError(f"Election with id {voting_id} does not exist")
 
+        if options["sync"] or options["bulk"]:
+            self.executor = None
+            if options["processes"] > 1:
+                self.executor = ProcessPoolExecutor(max_workers=options["processes"])
+            try:
+                if options["sync"]:
+                    self.handle_sync(voting, csv_path, options)
+                else:
+                    self.handle_bulk(voting, csv_path, options)
+            finally:
+                if self.executor is not None:
+                    self.executor.shutdown()
+            return
+
         with open(csv_path, newline="", encoding="utf-8") as csvfile:
             reader = csv.DictReader(csvfile)
             for row in reader:
@@ -38,6 +105,7 @@ class Command(BaseCommand):
                     defaults={
                         "email": email,
                         "verification_code": verification_code,
+                        "voter_key": voter_key(pesel, voting.id, settings.SECRET_SALT),
                     },
                 )
 
@@ -60,5 +128,149 @@ class Command(BaseCommand):
                             f"Voter already exists for this election: {email} (pesel {pesel})"
                         )
 
+    def handle_bulk(self, voting, csv_path, options):
+        chunk_size = options["chunk_size"]
+        update_existing = options["update_existing"]
+        checkpoint_path = options["checkpoint"] or f"{csv_path}.checkpoint"
+
+        done = 0
+        if options["resume"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("election_id") != voting.id:
+                raise CommandError(
+                    f"Checkpoint {checkpoint_path} belongs to election {checkpoint.get('election_id')}"
+                )
+            done = checkpoint["rows"]
+            self.stdout.write(f"Resuming after row {done}")
+
+        # One query for the whole roll: pesel -> voter id
+        existing = dict(
+            Voter.objects.filter(election=voting).values_list("pesel", "id")
+        )
+        totals = {"added": 0, "updated": 0, "skipped": 0, "invalid": 0}
+
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            reader = islice(csv.DictReader(csvfile), done, None)
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+
+                # Blank CSV emails keep the stored one, as in the per-row mode
+                to_create, to_update, to_update_code = [], [], []
+                for row in rows:
+                    pesel = (row.get("pesel") or "").strip()
+                    email = (row.get("email") or "").strip()
+                    if not pesel_is_valid(pesel):
+                        totals["invalid"] += 1
+                    elif pesel not in existing:
+                        existing[pesel] = None  # also dedupes repeats within the CSV
+                        to_create.append(
+                            Voter(
+                                pesel=pesel,
+                                email=email,
+                                verification_code=self.generate_code(),
+                                election=voting,
+                            )
+                        )
+                    elif update_existing and existing[pesel] is not None:
+                        voter = Voter(
+                            id=existing[pesel],
+                            email=email,
+                            verification_code=self.generate_code(),
+                        )
+                        (to_update if email else to_update_code).append(voter)
+                    else:
+                        totals["skipped"] += 1
+
+                self.assign_keys(to_create, voting)
+                with transaction.atomic():
+                    Voter.objects.bulk_create(to_create, ignore_conflicts=True)
+                    if to_update:
+                        Voter.objects.bulk_update(
+                            to_update, ["email", "verification_code"]
+                        )
+                    if to_update_code:
+                        Voter.objects.bulk_update(to_update_code, ["verification_code"])
+                totals["added"] += len(to_create)
+                totals["updated"] += len(to_update) + len(to_update_code)
+
+                done += len(rows)
+                with open(checkpoint_path, "w", encoding="utf-8") as f:
+                    json.dump({"election_id": voting.id, "rows": done}, f)
+                self.stdout.write(self.summary(done, totals))
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(
+            self.style.SUCCESS(f"Import finished. {self.summary(done, totals)}")
+        )
+
+    def handle_sync(self, voting, csv_path, options):
+        wanted = {}
+        invalid = 0
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                pesel = (row.get("pesel") or "").strip()
+                if pesel_is_valid(pesel):
+                    wanted[pesel] = (row.get("email") or "").strip()
+                else:
+                    invalid += 1
+
+        to_create, to_update, to_delete, kept = [], [], [], 0
+        for voter_id, pesel, email, voted in Voter.objects.filter(
+            election=voting
+        ).values_list("id", "pesel", "email", "has_voted"):
+            if pesel in wanted:
+                new_email = wanted.pop(pesel)
+                if new_email and new_email != email:
+                    # Only the email changes; the voter keeps their verification code
+                    to_update.append(Voter(id=voter_id, email=new_email))
+            elif voted:
+                kept += 1  # never drop a voter whose ballot is already cast
+            else:
+                to_delete.append(voter_id)
+        for pesel, email in wanted.items():
+            to_create.append(
+                Voter(
+                    pesel=pesel,
+                    email=email,
+                    verification_code=self.generate_code(),
+                    election=voting,
+                )
+            )
+
+        if not options["dry_run"]:
+            self.assign_keys(to_create, voting)
+            with transaction.atomic():
+                Voter.objects.bulk_create(to_create, batch_size=options["chunk_size"])
+                Voter.objects.bulk_update(
+                    to_update, ["email"], batch_size=options["chunk_size"]
+                )
+                Voter.objects.filter(id__in=to_delete).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Dry run: ' if options['dry_run'] else ''}"
+                f"Added: {len(to_create)}  Email changed: {len(to_update)}  "
+                f"Deleted: {len(to_delete)}  Kept (already voted): {kept}  "
+                f"Invalid PESEL: {invalid}"
+            )
+        )
+
+    def assign_keys(self, voters, voting):
+        keys = voter_keys(
+            [v.pesel for v in voters], voting.id, settings.SECRET_SALT, self.executor
+        )
+        for voter, key in zip(voters, keys):
+            voter.voter_key = key
+
+    def summary(self, done, totals):
+        return (
+            f"Rows: {done}  Added: {totals['added']}  Updated: {totals['updated']}  "
+            f"Skipped: {totals['skipped']}  Invalid PESEL: {totals['invalid']}"
+        )
+
     def generate_code(self):
         return "".join(random.choices(string.ascii_uppercase + string.digits, k=10))
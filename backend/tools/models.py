@@ -1,3 +1,69 @@
+"""Models tracking invitation mailing runs and per-voter deliveries"""
+
 from django.db import models
+from authentication.models import Election, Voter
+
+
+class MailingJob(models.Model):
+    """Model representing an invitation mailing run for an election"""
+
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    election = models.ForeignKey(
+        Election, on_delete=models.CASCADE, related_name="mailing_jobs"
+    )
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_RUNNING
+    )
+    total = models.IntegerField(default=0)
+    sent = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    # Worker currently sending the job; the lease is renewed with every message and
+    # a job whose lease expired (crashed worker) can be claimed by another one
+    lease_owner = models.CharField(max_length=32, blank=True, default="")
+    lease_until = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def progress(self) -> dict:
+        return {
+            "job_id": self.id,
+            "election_id": self.election_id,
+            "status": self.status,
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "error": self.error,
+        }
+
+
+class InvitationDelivery(models.Model):
+    """Model representing the delivery of one invitation within a mailing run"""
+
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    job = models.ForeignKey(
+        MailingJob, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    voter = models.ForeignKey(
+        Voter, on_delete=models.CASCADE, related_name="invitations"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
 
-# Create your models here.
+    class Meta:
+        unique_together = ("job", "voter")
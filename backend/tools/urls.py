@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import send_view
+from .views import send_view, job_status_view
 
 urlpatterns = [
     path("send-emails/<int:voting_id>/", send_view),
+    path("mailing-jobs/<int:job_id>/", job_status_view),
 ]
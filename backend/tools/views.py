@@ -1,12 +1,26 @@
-from django.http import HttpResponse
-from .mailing.email import send_mail
+from django.http import HttpResponse, JsonResponse
+from authentication.models import Election
+from .mailing.email import start_job
+from .models import MailingJob
 
 
 def send_view(request, voting_id):
-    """View to send emails to voters of a specific election identified by voting_id"""
+    """View starting (or resuming) the invitation job for the election identified by voting_id"""
     try:
-        sent_count = send_mail(voting_id)
+        job = start_job(voting_id)
+    except Election.DoesNotExist:
+        return HttpResponse(f"Election {voting_id} does not exist", status=404)
     except Exception as e:
         return HttpResponse(f"Error sending emails for {voting_id}: {e}", status=500)
 
-    return HttpResponse(f"Emails sent to {voting_id}. Count: {sent_count}")
+    return JsonResponse(job.progress(), status=202)
+
+
+def job_status_view(request, job_id):
+    """View reporting the progress of an invitation job"""
+    try:
+        job = MailingJob.objects.get(id=job_id)
+    except MailingJob.DoesNotExist:
+        return HttpResponse(f"Mailing job {job_id} does not exist", status=404)
+
+    return JsonResponse(job.progress())
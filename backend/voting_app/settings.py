@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "authentication.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -162,3 +163,150 @@ def get_env(name, default=None, required=False):
 
 SECRET_SALT = get_env("SECRET_SALT", required=True)
 ENCRYPTION_KEY = get_env("ENCRYPTION_KEY", required=True)
+
+# Relayer batching: queued votes are sent in one transaction once either the batch
+# is full or its oldest vote has waited for the window
+RELAYER_BATCH_SIZE = int(get_env("RELAYER_BATCH_SIZE", 50))
+RELAYER_BATCH_WINDOW_SECONDS = float(get_env("RELAYER_BATCH_WINDOW_SECONDS", 5))
+# A batch whose send fails stays queued and is retried after an exponential backoff
+# starting at RELAYER_RETRY_BASE_SECONDS, capped at RELAYER_RETRY_MAX_SECONDS
+RELAYER_RETRY_BASE_SECONDS = float(get_env("RELAYER_RETRY_BASE_SECONDS", 5))
+RELAYER_RETRY_MAX_SECONDS = float(get_env("RELAYER_RETRY_MAX_SECONDS", 300))
+
+# VoteCast indexer: first block to scan (contract deployment), blocks re-scanned on
+# every run to absorb shallow reorgs, and the upper bound of one eth_getLogs range
+INDEXER_START_BLOCK = int(get_env("INDEXER_START_BLOCK", 0))
+INDEXER_REORG_DEPTH = int(get_env("INDEXER_REORG_DEPTH", 12))
+INDEXER_MAX_BLOCK_RANGE = int(get_env("INDEXER_MAX_BLOCK_RANGE", 2000))
+
+# Cache shared by the workers (contract view calls, block number). Set REDIS_URL to
+# share it across processes; otherwise each process keeps a bounded in-memory LRU
+REDIS_URL = get_env("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+CHAIN_CACHE_ALIAS = get_env("CHAIN_CACHE_ALIAS", "default")
+CHAIN_BLOCK_CACHE_SECONDS = float(get_env("CHAIN_BLOCK_CACHE_SECONDS", 2))
+
+# Signature recovery: "auto" uses libsecp256k1 (coincurve) when installed and falls
+# back to eth_account; a positive process count moves recovery into a process pool
+SIGNATURE_BACKEND = get_env("SIGNATURE_BACKEND", "auto")
+SIGNATURE_RECOVERY_PROCESSES = int(get_env("SIGNATURE_RECOVERY_PROCESSES", 0))
+
+# Serve the vote and results endpoints with async views (AsyncWeb3 + async ORM);
+# intended for ASGI servers, e.g. `uvicorn voting_app.asgi:application`
+ASYNC_VIEWS = get_env("ASYNC_VIEWS", "False") == "True"
+
+# JSON-RPC endpoints (comma separated). Reads are balanced across healthy endpoints,
+# transaction sends stick to the first healthy one in this order
+RPC_URLS = [u.strip() for u in get_env("RPC_URLS", "").split(",") if u.strip()]
+if not RPC_URLS and os.getenv("ALCHEMY_API_KEY"):
+    RPC_URLS = [f"https://eth-sepolia.g.alchemy.com/v2/{os.environ['ALCHEMY_API_KEY']}"]
+RPC_TIMEOUT_SECONDS = float(get_env("RPC_TIMEOUT_SECONDS", 10))
+RPC_POOL_SIZE = int(get_env("RPC_POOL_SIZE", 20))
+RPC_FAILURE_THRESHOLD = int(get_env("RPC_FAILURE_THRESHOLD", 3))
+RPC_COOLDOWN_SECONDS = float(get_env("RPC_COOLDOWN_SECONDS", 30))
+
+# Chain backend: "web3" (deployed ElectionManager over RPC_URLS), "memory" (in-process
+# simulation for local runs and load tests) or a dotted path to a ChainBackend class
+CHAIN_BACKEND = get_env("CHAIN_BACKEND", "web3")
+
+# Invitation mailer: voters per chunk and the maximum number of messages per
+# second sent over the shared SMTP connection (0 disables the limit). A job is sent
+# by one worker at a time; its lease expires MAILING_LEASE_SECONDS after the last
+# message, after which another worker may resume it
+MAILING_CHUNK_SIZE = int(get_env("MAILING_CHUNK_SIZE", 100))
+MAILING_RATE_PER_SECOND = float(get_env("MAILING_RATE_PER_SECOND", 10))
+MAILING_LEASE_SECONDS = int(get_env("MAILING_LEASE_SECONDS", 120))
+
+# Election list/detail response cache, keyed by a version read from the database so
+# any worker sees edits at once; entries also expire at the next election start or
+# end so the computed status never goes stale
+ELECTION_CACHE_ALIAS = get_env("ELECTION_CACHE_ALIAS", "default")
+ELECTION_CACHE_SECONDS = int(get_env("ELECTION_CACHE_SECONDS", 300))
+
+# Sign-in challenges are stored in the database ("db"), or HMAC-signed and checked
+# without a lookup ("hmac"); in hmac mode the cache remembering used challenges must
+# be shared between workers (startup fails on a per-process cache unless DEBUG)
+CHALLENGE_MODE = get_env("CHALLENGE_MODE", "db")
+CHALLENGE_TTL_SECONDS = int(get_env("CHALLENGE_TTL_SECONDS", 600))
+CHALLENGE_CACHE_ALIAS = get_env("CHALLENGE_CACHE_ALIAS", "default")
+
+# Cache holding voting sessions in front of the database (writes go through to the DB)
+VOTING_SESSION_CACHE_ALIAS = get_env("VOTING_SESSION_CACHE_ALIAS", "default")
+
+# Token-bucket throttling per endpoint, as "<capacity>/<period>" (s, min, h, day) per
+# client IP and per address (session for votes); an empty value disables a bucket.
+# Buckets live in THROTTLE_CACHE_ALIAS so every worker shares them
+THROTTLE_CACHE_ALIAS = get_env("THROTTLE_CACHE_ALIAS", "default")
+# Client IPs for the per-IP buckets: with NUM_PROXIES=0 (default) the socket
+# address is used and X-Forwarded-For is ignored, since clients can forge it. Behind
+# N trusted reverse proxies, set NUM_PROXIES=N to take the address they appended
+REST_FRAMEWORK["NUM_PROXIES"] = int(get_env("NUM_PROXIES", 0))
+THROTTLE_RATES = {
+    "challenge": {
+        "ip": get_env("THROTTLE_CHALLENGE_IP", "60/min"),
+        "address": get_env("THROTTLE_CHALLENGE_ADDRESS", "10/min"),
+    },
+    "verify": {
+        "ip": get_env("THROTTLE_VERIFY_IP", "30/min"),
+        "address": get_env("THROTTLE_VERIFY_ADDRESS", "10/min"),
+    },
+    "vote": {
+        "ip": get_env("THROTTLE_VOTE_IP", "30/min"),
+        "address": get_env("THROTTLE_VOTE_ADDRESS", "5/min"),
+    },
+}
+
+# Votes are refused with 503 + Retry-After while this many are queued or awaiting
+# confirmation on-chain (0 disables the cap)
+VOTE_MAX_BACKLOG = int(get_env("VOTE_MAX_BACKLOG", 10000))
+VOTE_BACKLOG_RETRY_AFTER = int(get_env("VOTE_BACKLOG_RETRY_AFTER", 10))
+
+# EIP-1559 fee oracle over eth_feeHistory: the priority fee is the median of the
+# FEE_REWARD_PERCENTILE tips of the last FEE_HISTORY_BLOCKS blocks (at least
+# FEE_MIN_PRIORITY_GWEI) and maxFeePerGas = base fee * FEE_BASE_FEE_MULTIPLIER + tip,
+# capped at FEE_MAX_GWEI
+FEE_HISTORY_BLOCKS = int(get_env("FEE_HISTORY_BLOCKS", 20))
+FEE_REWARD_PERCENTILE = float(get_env("FEE_REWARD_PERCENTILE", 50))
+FEE_CACHE_SECONDS = float(get_env("FEE_CACHE_SECONDS", 12))
+FEE_BASE_FEE_MULTIPLIER = float(get_env("FEE_BASE_FEE_MULTIPLIER", 2))
+FEE_MIN_PRIORITY_GWEI = float(get_env("FEE_MIN_PRIORITY_GWEI", 1))
+FEE_MAX_GWEI = float(get_env("FEE_MAX_GWEI", 200))
+
+# Gas limits are estimated per function and batch size, padded and cached
+GAS_LIMIT_PADDING = float(get_env("GAS_LIMIT_PADDING", 1.2))
+GAS_ESTIMATE_CACHE_SECONDS = int(get_env("GAS_ESTIMATE_CACHE_SECONDS", 3600))
+
+# Relayer transactions pending longer than this are re-broadcast under the same
+# nonce with fees raised by RELAYER_FEE_BUMP_PERCENT (nodes require at least 10)
+RELAYER_REBROADCAST_SECONDS = float(get_env("RELAYER_REBROADCAST_SECONDS", 180))
+RELAYER_FEE_BUMP_PERCENT = float(get_env("RELAYER_FEE_BUMP_PERCENT", 15))
+
+# Relayer pool: private keys (comma separated) of the accounts submitting votes, each
+# with its own nonce lane; defaults to the deployer account. Lanes must be allowed by
+# the contract owner (setRelayer, see the relayer_lanes command). Lanes below
+# RELAYER_MIN_BALANCE_ETH are disabled until funded; a lane whose send fails pauses
+# for RELAYER_LANE_COOLDOWN_SECONDS
+RELAYER_PRIVATE_KEYS = [
+    k.strip() for k in get_env("RELAYER_PRIVATE_KEYS", "").split(",") if k.strip()
+]
+RELAYER_MIN_BALANCE_ETH = float(get_env("RELAYER_MIN_BALANCE_ETH", 0.01))
+RELAYER_LANE_CHECK_SECONDS = float(get_env("RELAYER_LANE_CHECK_SECONDS", 60))
+RELAYER_LANE_COOLDOWN_SECONDS = float(get_env("RELAYER_LANE_COOLDOWN_SECONDS", 30))
+
+# Prometheus metrics (request/stage latency, DB queries per request, chain calls per
+# method) served on /metrics; set METRICS_TOKEN to require a bearer token for scrapes
+METRICS_ENABLED = get_env("METRICS_ENABLED", "True") == "True"
+METRICS_TOKEN = get_env("METRICS_TOKEN", "")
@@ -2,6 +2,7 @@
 
 from django.contrib import admin
 from django.urls import path, include
+from authentication.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -10,4 +11,5 @@ urlpatterns = [
         "api/",
         include(("authentication.urls", "authentication"), namespace="authentication"),
     ),
+    path("metrics", metrics_view, name="metrics"),
 ]
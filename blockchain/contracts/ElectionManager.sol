@@ -6,6 +6,8 @@ import "@openzeppelin/contracts/access/Ownable.sol";
 contract ElectionManager is Ownable {
     mapping(uint256 => mapping(uint256 => uint256)) public votesCount;
     mapping(bytes32 => bool) public hasVoted;
+    // Accounts allowed to submit votes besides the owner (the relayer pool)
+    mapping(address => bool) public relayers;
 
     event VoteCast(
         uint256 indexed electionId,
@@ -13,14 +15,58 @@ contract ElectionManager is Ownable {
         bytes32 indexed voterKey
     );
 
+    event VoteSkipped(uint256 indexed electionId, bytes32 indexed voterKey);
+
+    event RelayerUpdated(address indexed relayer, bool allowed);
+
     constructor(address owner_) Ownable(owner_) {}
 
+    modifier onlyRelayer() {
+        require(msg.sender == owner() || relayers[msg.sender], "Not a relayer");
+        _;
+    }
+
+    function setRelayer(address relayer, bool allowed) external onlyOwner {
+        relayers[relayer] = allowed;
+        emit RelayerUpdated(relayer, allowed);
+    }
+
     function markVotedAndCount(
         uint256 electionId,
         bytes32 voterKey,
         uint256 choiceId
-    ) external onlyOwner {
+    ) external onlyRelayer {
         require(!hasVoted[voterKey], "Already voted");
+        _count(electionId, voterKey, choiceId);
+    }
+
+    // Counts a batch of votes in one transaction; keys that already voted are
+    // skipped (with a VoteSkipped event) instead of reverting the whole batch
+    function markVotedAndCountBatch(
+        uint256[] calldata electionIds,
+        bytes32[] calldata voterKeys,
+        uint256[] calldata choiceIds
+    ) external onlyRelayer returns (uint256 counted) {
+        require(
+            electionIds.length == voterKeys.length &&
+                voterKeys.length == choiceIds.length,
+            "Length mismatch"
+        );
+        for (uint256 i = 0; i < voterKeys.length; i++) {
+            if (hasVoted[voterKeys[i]]) {
+                emit VoteSkipped(electionIds[i], voterKeys[i]);
+                continue;
+            }
+            _count(electionIds[i], voterKeys[i], choiceIds[i]);
+            counted++;
+        }
+    }
+
+    function _count(
+        uint256 electionId,
+        bytes32 voterKey,
+        uint256 choiceId
+    ) private {
         hasVoted[voterKey] = true;
         votesCount[electionId][choiceId] += 1;
         emit VoteCast(electionId, choiceId, voterKey);
@@ -32,4 +78,14 @@ contract ElectionManager is Ownable {
     ) external view returns (uint256) {
         return votesCount[electionId][choiceId];
     }
+
+    function getChoiceCounts(
+        uint256 electionId,
+        uint256[] calldata choiceIds
+    ) external view returns (uint256[] memory counts) {
+        counts = new uint256[](choiceIds.length);
+        for (uint256 i = 0; i < choiceIds.length; i++) {
+            counts[i] = votesCount[electionId][choiceIds[i]];
+        }
+    }
 }
@@ -12,6 +12,17 @@ async function main() {
   const address = await contract.getAddress();
 
   console.log("ElectionManager deployed at:", address);
+
+  // Authorize the backend's relayer accounts (comma separated addresses)
+  const relayers = (process.env.RELAYER_ADDRESSES || "")
+    .split(",")
+    .map((a) => a.trim())
+    .filter(Boolean);
+  for (const relayer of relayers) {
+    const tx = await contract.setRelayer(relayer, true);
+    await tx.wait();
+    console.log("Relayer authorized:", relayer);
+  }
 }
 
 main().catch((e) => {